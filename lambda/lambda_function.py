@@ -1,21 +1,64 @@
+import os
+import time
 from process_meteonetwork_retriever import parse_event
-from process_meteonetwork_retriever import main_python as main_function
+from process_meteonetwork_retriever.batch import resolve_function
+from process_meteonetwork_retriever.cli.module_log import flush_log
+from process_meteonetwork_retriever.utils.module_metrics import REGISTRY
+from process_meteonetwork_retriever.utils.module_lease import split_event, publish_units, run_worker
+
+# seconds left to the invocation when a worker stops claiming new units
+WORKER_MARGIN = 60
+
+
+def get_function():
+    """
+    get_function - the job function, "module:function" in METEONETWORK_FUNCTION,
+    by default run_meteonetwork_retriever
+    """
+    try:
+        return resolve_function(os.environ.get("METEONETWORK_FUNCTION"))
+    except ValueError:
+        raise ValueError("run_meteonetwork_retriever is not available, "
+                         "set METEONETWORK_FUNCTION to the module:function to run") from None
 
 
 def lambda_handler(event, context):
     """
     lambda_handler - lambda function
+    mode=coordinator splits the event in units under lease_root,
+    mode=worker processes the units of lease_root until none is left.
     """
-    kwargs = parse_event(event, main_function)
+    try:
+        REGISTRY.reset()
+        event = dict(event)
+        mode = event.pop("mode", None)
+        lease_root = event.pop("lease_root", None)
 
-    res = main_function(**kwargs)
+        if mode == "coordinator":
+            size = int(event.pop("unit_size", 50))
+            res = publish_units(lease_root, split_event(event, size=size))
+        elif mode == "worker":
+            main_function = get_function()
+            deadline = None
+            if context is not None:
+                deadline = time.time() + context.get_remaining_time_in_millis() / 1000 - WORKER_MARGIN
+            res = run_worker(lease_root, lambda unit: main_function(**parse_event(unit, main_function)),
+                             owner=getattr(context, "aws_request_id", None), deadline=deadline)
+        else:
+            main_function = get_function()
+            kwargs = parse_event(event, main_function)
+            res = main_function(**kwargs)
 
-    return {
-        "statusCode": 200, 
-        "body": {
-            "result": res   
+        return {
+            "statusCode": 200, 
+            "body": {
+                "result": res,
+                "metrics": REGISTRY.to_json()
+            }
         }
-    }
+    finally:
+        # records still queued would be lost when the runtime freezes
+        flush_log()
 
 
 if __name__ == "__main__":
@@ -24,6 +67,7 @@ if __name__ == "__main__":
         "debug": "false"
     }
 
+    main_function = get_function()
     kwargs = parse_event(event, main_function)
     res = main_function(**kwargs)
     print(res)
@@ -1,10 +1,18 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from .meteonetwork import _MeteoNetworkRetriever
 import importlib.util
-if importlib.util.find_spec('pygeoapi') is not None:
+
+# the retriever may be missing from a build: utils, batch and compaction
+# stay importable without it
+try:
+    from .meteonetwork import _MeteoNetworkRetriever
+    from .main import run_meteonetwork_retriever
+except ImportError:
+    _MeteoNetworkRetriever = None
+    run_meteonetwork_retriever = None
+
+if _MeteoNetworkRetriever is not None and importlib.util.find_spec('pygeoapi') is not None:
     from .meteonetwork import MeteoNetworkRetrieverProcessor
 
-from .main import run_meteonetwork_retriever
-from .utils.strings import parse_event
\ No newline at end of file
+from .utils.strings import parse_event
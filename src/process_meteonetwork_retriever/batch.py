@@ -0,0 +1,194 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        batch.py
+# Purpose:     Run many retriever jobs from a manifest in a process pool
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import os
+import sys
+import csv
+import json
+import time
+import traceback
+import importlib
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import click
+from .cli.module_log import Logger, set_log_debug, set_log_info
+from .utils.filesystem import justext
+from .utils.module_s3 import copy, iss3, tmp, get_client
+from .utils.module_http import get_cache
+from .utils.module_token import get_token_manager
+from .utils.module_status import set_status
+from .utils.strings import parse_event, parse_events
+
+
+def read_manifest(manifest):
+    """
+    read_manifest - the list of jobs of a csv, json or yaml manifest (local or s3)
+    Each job is a dict of the options of run_meteonetwork_retriever.
+    """
+    filename = copy(manifest) if iss3(manifest) else manifest
+    ext = justext(filename).lower()
+    with open(filename, "r", encoding="utf-8") as stream:
+        if ext == "csv":
+            jobs = [{k: v for k, v in row.items() if v not in (None, "")} for row in csv.DictReader(stream)]
+        elif ext == "json":
+            jobs = json.load(stream)
+        elif ext in ("yaml", "yml"):
+            if importlib.util.find_spec("yaml") is None:
+                raise ValueError("PyYAML is required to read yaml manifests")
+            import yaml
+            jobs = yaml.safe_load(stream)
+        else:
+            raise ValueError(f"Unsupported manifest format: {ext}")
+    if isinstance(jobs, dict):
+        jobs = jobs.get("jobs", [])
+    return jobs
+
+
+def _init_worker():
+    """
+    _init_worker - warm up the clients and caches once per worker process
+    An exception here would break the pool and the whole batch: without a
+    token the jobs log in, or fail, on their own.
+    """
+    get_client()
+    get_cache()
+    try:
+        get_token_manager().get()
+    except Exception as ex:
+        Logger.warning("Could not get the MeteoNetwork token, continuing without it: %s", ex)
+
+
+def resolve_function(func=None):
+    """
+    resolve_function - the function run for each job: a callable, a
+    "module:function" string, by default run_meteonetwork_retriever
+    """
+    if callable(func):
+        return func
+    if func:
+        module, _, name = func.partition(":")
+        return getattr(importlib.import_module(module), name)
+    from . import run_meteonetwork_retriever
+    if run_meteonetwork_retriever is None:
+        raise ValueError("run_meteonetwork_retriever is not available, pass the function to run")
+    return run_meteonetwork_retriever
+
+
+def _run_job(index, job, func):
+    """
+    _run_job - run one job of the manifest, never raises
+    """
+    t = time.perf_counter()
+    res = {"job": job.get("jid", index), "status": "OK", "elapsed": 0.0, "error": None}
+    try:
+        kwargs = parse_event(job, func)
+        res["result"] = func(**kwargs)
+    except Exception as ex:
+        res["status"] = "ERROR"
+        res["error"] = f"{ex}"
+        res["traceback"] = traceback.format_exc()
+        set_status(job.get("backend"), job.get("jid"), -1, f"{ex}")
+    res["elapsed"] = round(time.perf_counter() - t, 3)
+    return res
+
+
+def run_batch(manifest, workers=None, report=None, backend=None, jid=None, func=None):
+    """
+    run_batch - run the jobs of the manifest in a process pool
+    :param workers: number of worker processes, default the available cores
+    :param report: local or s3 json file of the summary report
+    :param func: function run for each job, a module level callable or a
+        "module:function" string, default run_meteonetwork_retriever
+    :return: the summary report
+    """
+    func = resolve_function(func)
+    t = time.perf_counter()
+    jobs = read_manifest(manifest)
+    # validate the whole manifest once, before paying for the workers
+    errors = {index: errors for index, (_, errors) in enumerate(parse_events(jobs, func))
+              if errors}
+    for index, job_errors in errors.items():
+        Logger.warning("job %s: %s", jobs[index].get("jid", index), "; ".join(e["error"] for e in job_errors))
+    if not workers:
+        workers = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    set_status(backend, jid, 0, f"Running {len(jobs)} jobs on {workers} workers...")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = [executor.submit(_run_job, index, job, func) for index, job in enumerate(jobs)]
+        for future in as_completed(futures):
+            res = future.result()
+            results.append(res)
+            Logger.info("job %s: %s in %.2fs", res["job"], res["status"], res["elapsed"])
+            if len(results) < len(jobs):
+                set_status(backend, jid, int(100 * len(results) / len(jobs)))
+
+    failed = [res for res in results if res["status"] != "OK"]
+    summary = {
+        "manifest": manifest,
+        "jobs": len(jobs),
+        "ok": len(jobs) - len(failed),
+        "failed": len(failed),
+        "workers": workers,
+        "elapsed": round(time.perf_counter() - t, 3),
+        "errors": errors,
+        "results": results,
+    }
+
+    if report:
+        filename = tmp(report) if iss3(report) else report
+        with open(filename, "w", encoding="utf-8") as stream:
+            json.dump(summary, stream, indent=2, default=str)
+        if iss3(report):
+            copy(filename, report)
+
+    message = f"{summary['ok']}/{len(jobs)} jobs completed in {summary['elapsed']:.2f}s."
+    if failed:
+        set_status(backend, jid, -1, message)
+    else:
+        set_status(backend, jid, 100, message)
+    return summary
+
+
+@click.command()
+@click.option("--manifest", type=click.STRING, required=True, help="The csv, json or yaml manifest of the jobs.")
+@click.option("--workers", type=click.INT, required=False, default=None, help="The number of worker processes.")
+@click.option("--report", type=click.STRING, required=False, default=None, help="The json summary report.")
+@click.option("--backend", type=click.STRING, required=False, default=None, help="The backend to use for sending back progress status updates.")
+@click.option("--jid", type=click.STRING, required=False, default=None, help="The job ID of the batch.")
+@click.option("--function", type=click.STRING, required=False, default=None, help="The module:function to run for each job, default run_meteonetwork_retriever.")
+@click.option("--verbose", is_flag=True, required=False, default=False, help="Print some words more about what is doing.")
+@click.option("--debug", is_flag=True, required=False, default=False, help="Debug mode.")
+def cli_run_meteonetwork_batch(manifest, workers, report, backend, jid, function, verbose, debug):
+    """
+    cli_run_meteonetwork_batch - run the jobs of a manifest in one invocation
+    """
+    if verbose:
+        set_log_info()
+    if debug:
+        set_log_debug()
+    summary = run_batch(manifest, workers=workers, report=report, backend=backend, jid=jid, func=function)
+    click.echo(json.dumps({k: v for k, v in summary.items() if k != "results"}))
+    if summary["failed"]:
+        sys.exit(1)
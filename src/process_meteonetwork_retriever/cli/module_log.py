@@ -22,13 +22,245 @@
 #
 # Created:     27/12/2022
 # -----------------------------------------------------------------------------
+import os
+import sys
+import json
+import time
+import queue
+import atexit
 import logging
+import contextlib
+import threading
+import contextvars
+import multiprocessing.util
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
 
-# Configure the logger
-logging.basicConfig(format="[%(levelname)-8s] %(message)s")
+TEXT_FORMAT = "[%(levelname)-8s] %(message)s"
+
+# job ID and span of the current context, added to every record
+_context = contextvars.ContextVar("log_context", default={})
+
+
+class ContextFilter(logging.Filter):
+    """
+    ContextFilter - add the job ID and the span of the caller to the record
+    """
+
+    def filter(self, record):
+        context = _context.get()
+        record.jid = context.get("jid")
+        record.span = context.get("span")
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    RateLimitFilter - let at most burst records with the same level and
+    message template through every period seconds, the others are counted
+    and reported with the next record that passes
+    """
+
+    def __init__(self, burst=20, period=60.0):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self.windows = {}
+        self.pruned = time.monotonic()
+        self.lock = threading.Lock()
+
+    def prune(self, now):
+        """
+        prune - drop the windows older than period, at most once per period:
+        messages of the exceptions are keys too, they would pile up. The
+        suppressed count of a dropped window is not reported.
+        """
+        if now - self.pruned < self.period:
+            return
+        self.pruned = now
+        self.windows = {key: window for key, window in self.windows.items() if now - window[0] < self.period}
+
+    def filter(self, record):
+        key = (record.levelno, record.pathname, record.lineno, str(record.msg))
+        now = time.monotonic()
+        with self.lock:
+            start, count, suppressed = self.windows.get(key, (now, 0, 0))
+            if now - start >= self.period:
+                if suppressed:
+                    record.suppressed = suppressed
+                start, count, suppressed = now, 0, 0
+            passed = count < self.burst
+            self.windows[key] = (start, count + 1, suppressed) if passed else (start, count, suppressed + 1)
+            self.prune(now)
+            return passed
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    JsonFormatter - one json object per record
+    """
+
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "jid": getattr(record, "jid", None),
+            "span": getattr(record, "span", None),
+        }
+        if getattr(record, "suppressed", 0):
+            data["suppressed"] = record.suppressed
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+class BufferHandler(logging.Handler):
+    """
+    BufferHandler - keep the last records of the job in memory
+    """
+
+    def __init__(self, capacity=10000):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(self.format(record))
+
+    def flush_text(self):
+        """
+        flush_text - the buffered lines, the buffer is emptied
+        """
+        text = "\n".join(self.records)
+        self.records.clear()
+        return text
+
+
+class FlushingQueueListener(QueueListener):
+    """
+    FlushingQueueListener - QueueListener setting the Events put in the
+    queue, once the records queued before them are written
+    """
+
+    def handle(self, record):
+        if isinstance(record, threading.Event):
+            record.set()
+            return
+        super().handle(record)
+
+
+def _formatter():
+    """
+    _formatter - json on Lambda or with LOG_FORMAT=json, plain text otherwise
+    """
+    if os.environ.get("LOG_FORMAT", "").lower() == "json" or os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT)
+
+
+# The callers only put the records in a queue, a background thread writes them
+_stream_handler = logging.StreamHandler(sys.stderr)
+_stream_handler.setFormatter(_formatter())
+_buffer_handler = BufferHandler()
+_buffer_handler.setFormatter(JsonFormatter())
+
+_queue = queue.SimpleQueue()
+_queue_handler = QueueHandler(_queue)
+_queue_handler.addFilter(ContextFilter())
+_queue_handler.addFilter(RateLimitFilter())
+
+_listener = FlushingQueueListener(_queue, _stream_handler, _buffer_handler, respect_handler_level=True)
+_listener.start()
+# guards the start and stop of the listener thread
+_listener_lock = threading.Lock()
+
+
+def flush_log(timeout=5.0):
+    """
+    flush_log - write out the queued records, before a Lambda handler
+    returns or a process exits: waits for a marker put behind them, the
+    listener thread keeps running so that concurrent callers are safe
+    """
+    thread = _listener._thread
+    if thread is None or thread is threading.current_thread():
+        return
+    done = threading.Event()
+    _queue.put(done)
+    done.wait(timeout)
+
+
+def _stop_listener():
+    with _listener_lock:
+        if _listener._thread is not None:
+            _listener.stop()  # writes the queue up to the end
+
+
+def _after_fork():
+    """
+    _after_fork - the listener thread does not survive a fork: the child
+    gets its own queue and listener
+    """
+    global _queue, _listener_lock
+    _listener_lock = threading.Lock()
+    _queue = queue.SimpleQueue()
+    _queue_handler.queue = _queue
+    _listener.queue = _queue
+    _listener._thread = None
+    _listener.start()
+
+
+def _register_finalizer(listener):
+    # multiprocessing children leave with os._exit, atexit is not run
+    multiprocessing.util.Finalize(listener, _stop_listener, exitpriority=0)
+
+
+atexit.register(_stop_listener)
+_register_finalizer(_listener)
+multiprocessing.util.register_after_fork(_listener, _register_finalizer)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
 
 Logger = logging.getLogger(__name__)
 Logger.setLevel(logging.WARNING)
+Logger.addHandler(_queue_handler)
+Logger.propagate = False
+
+
+def set_log_context(**kwargs):
+    """
+    set_log_context - set the job ID (jid) and other context of the records
+    """
+    _context.set({**_context.get(), **kwargs})
+
+
+@contextlib.contextmanager
+def log_span(name):
+    """
+    log_span - records logged inside the block carry the span name
+    """
+    token = _context.set({**_context.get(), "span": name})
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        Logger.debug("span %s completed in %.3fs", name, time.perf_counter() - t)
+        _context.reset(token)
+
+
+def clear_job_log():
+    """
+    clear_job_log - drop the buffered records, at the start of a job
+    """
+    _buffer_handler.records.clear()
+
+
+def get_job_log():
+    """
+    get_job_log - the json lines buffered since the last call
+    """
+    flush_log()
+    return _buffer_handler.flush_text()
+
 
 # Some functions
 def set_log_debug():
@@ -54,4 +286,4 @@ def set_log_error():
 def set_log_critical():
     """Set the logger to critical level."""
     Logger.setLevel(logging.CRITICAL)
-    Logger.critical("Logger set to CRITICAL level.")
\ No newline at end of file
+    Logger.critical("Logger set to CRITICAL level.")
@@ -0,0 +1,202 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        compaction.py
+# Purpose:     Merge the small parquet files of the hive partitions
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import os
+import json
+import time
+import uuid
+import click
+import pyarrow as pa
+import pyarrow.parquet as pq
+from .cli.module_log import Logger, set_log_debug, set_log_info
+from .utils.module_s3 import copy, move, delete, isfile, iss3, tmp
+from .utils.module_manifest import list_files, file_stats, load_manifest, update_manifest, rebuild_manifest
+from .utils.module_status import set_status
+
+# compacted files are written up to this size
+TARGET_SIZE = 128 * 1024 * 1024
+# files smaller than this fraction of TARGET_SIZE are merged
+SMALL_FRACTION = 0.5
+ROW_GROUP_SIZE = 128 * 1024
+SORT_KEYS = ("timestamp", "station_id")
+
+
+def list_partitions(root, client=None):
+    """
+    list_partitions - the parquet files of each partition under root
+    :return: dict partition uri -> list of (file uri, size)
+    """
+    partitions = {}
+    for uri, size in list_files(root, client=client):
+        partitions.setdefault(uri.rsplit("/", 1)[0], []).append((uri, size))
+    return partitions
+
+
+def small_files(files, target_size=TARGET_SIZE):
+    """
+    small_files - the files worth merging, in name order
+    """
+    return sorted(f for f in files if f[1] < target_size * SMALL_FRACTION)
+
+
+def is_compact(files, target_size=TARGET_SIZE):
+    """
+    is_compact - True if there are no two small files to merge
+    """
+    return len(small_files(files, target_size)) < 2
+
+
+def plan_groups(files, target_size=TARGET_SIZE):
+    """
+    plan_groups - split the small files in groups of about target_size bytes
+    Each group becomes one compacted file, so a merge never holds more than
+    target_size bytes of input in memory.
+    """
+    groups, group, size = [], [], 0
+    for uri, nbytes in small_files(files, target_size):
+        if group and size + nbytes > target_size:
+            groups.append(group)
+            group, size = [], 0
+        group.append((uri, nbytes))
+        size += nbytes
+    if group:
+        groups.append(group)
+    return [group for group in groups if len(group) > 1]
+
+
+def merge_files(uris, fileout, client=None):
+    """
+    merge_files - merge parquet files into fileout sorted by time and station
+    :return: the manifest entry of fileout
+    """
+    tables = [pq.read_table(copy(uri, client=client) if iss3(uri) else uri) for uri in uris]
+    table = pa.concat_tables(tables, promote_options="default")
+    keys = [(key, "ascending") for key in SORT_KEYS if key in table.column_names]
+    if keys:
+        table = table.sort_by(keys)
+    pq.write_table(table, fileout, row_group_size=ROW_GROUP_SIZE, compression="zstd")
+    return file_stats(table, os.path.getsize(fileout))
+
+
+def publish(fileout, uri, client=None):
+    """
+    publish - upload to a staging key, then move it in place in one step
+    so that readers never see a partially written file
+    copy and move only log their failures, so each step is checked and a
+    failure raises before the caller drops the merged files.
+    """
+    folder, name = uri.rsplit("/", 1)
+    staged = f"{folder}/_compacting/{name}"
+    if not iss3(uri):
+        os.makedirs(f"{folder}/_compacting", exist_ok=True)
+    copy(fileout, staged, client=client)
+    if not isfile(staged, client=client):
+        raise RuntimeError(f"Could not upload {staged}")
+    move(staged, uri, client=client)
+    if not isfile(uri, client=client):
+        raise RuntimeError(f"Could not move {staged} to {uri}")
+    if not iss3(uri) and not os.listdir(f"{folder}/_compacting"):
+        os.rmdir(f"{folder}/_compacting")
+    return uri
+
+
+def compact_partition(partition, files, target_size=TARGET_SIZE, dry_run=False, root=None, client=None):
+    """
+    compact_partition - merge the small files of one partition
+    The new file is published and checked before the old ones are deleted,
+    so a failure can leave duplicated rows for a moment but never lose
+    data. With root, the swap is committed to its manifest in between, so
+    that readers of the manifest see either the old files or the new one.
+    :return: list of (new file uri, merged file uris, rows)
+    """
+    res = []
+    for group in plan_groups(files, target_size):
+        uris = [uri for uri, _ in group]
+        uri = f"{partition}/part-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        if dry_run:
+            res.append((uri, uris, None))
+            continue
+        fileout = tmp("compacted.parquet")
+        try:
+            stats = merge_files(uris, fileout, client=client)
+            publish(fileout, uri, client=client)
+        finally:
+            if os.path.isfile(fileout):
+                os.unlink(fileout)
+        if root:
+            update_manifest(root, add={uri: stats}, remove=uris, client=client)
+        for old in uris:
+            delete(old, client=client)
+        Logger.debug("compacted %d files into %s (%d rows)", len(uris), uri, stats["rows"])
+        res.append((uri, uris, stats["rows"]))
+    return res
+
+
+def run_compaction(root, target_size=TARGET_SIZE, dry_run=False, backend=None, jid=None, client=None):
+    """
+    run_compaction - compact all the partitions under root, skipping those
+    that are already compact
+    :return: the summary report
+    """
+    t = time.perf_counter()
+    partitions = list_partitions(root, client=client)
+    todo = {p: files for p, files in partitions.items() if not is_compact(files, target_size)}
+    if todo and not dry_run and load_manifest(root, client=client) is None:
+        rebuild_manifest(root, [f for files in partitions.values() for f in files], client=client)
+    set_status(backend, jid, 0, f"Compacting {len(todo)} of {len(partitions)} partitions...")
+
+    summary = {"root": root, "partitions": len(partitions), "compacted": 0,
+               "files_before": 0, "files_after": 0, "dry_run": dry_run}
+    for n, (partition, files) in enumerate(sorted(todo.items()), 1):
+        merged = compact_partition(partition, files, target_size, dry_run=dry_run, root=root, client=client)
+        removed = sum(len(uris) for _, uris, _ in merged)
+        summary["compacted"] += 1
+        summary["files_before"] += len(files)
+        summary["files_after"] += len(files) - removed + len(merged)
+        Logger.info("%s: %d -> %d files", partition, len(files), len(files) - removed + len(merged))
+        set_status(backend, jid, min(99, int(100 * n / len(todo))))
+
+    summary["elapsed"] = round(time.perf_counter() - t, 3)
+    set_status(backend, jid, 100, f"{summary['compacted']} partitions compacted in {summary['elapsed']:.2f}s.")
+    return summary
+
+
+@click.command()
+@click.option("--root", type=click.STRING, required=True, help="The local or s3 root of the hive partitioned dataset.")
+@click.option("--target-size-mb", type=click.INT, required=False, default=TARGET_SIZE // 2**20, help="The size of the compacted files in MB.")
+@click.option("--dry-run", is_flag=True, required=False, default=False, help="Only report the partitions to compact.")
+@click.option("--backend", type=click.STRING, required=False, default=None, help="The backend to use for sending back progress status updates.")
+@click.option("--jid", type=click.STRING, required=False, default=None, help="The job ID.")
+@click.option("--verbose", is_flag=True, required=False, default=False, help="Print some words more about what is doing.")
+@click.option("--debug", is_flag=True, required=False, default=False, help="Debug mode.")
+def cli_run_meteonetwork_compaction(root, target_size_mb, dry_run, backend, jid, verbose, debug):
+    """
+    cli_run_meteonetwork_compaction - merge the small files of the partitions
+    """
+    if verbose:
+        set_log_info()
+    if debug:
+        set_log_debug()
+    summary = run_compaction(root, target_size=target_size_mb * 2**20, dry_run=dry_run, backend=backend, jid=jid)
+    click.echo(json.dumps(summary))
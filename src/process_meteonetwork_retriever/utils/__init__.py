@@ -2,4 +2,15 @@ from . import filesystem
 from . import module_prologo
 from . import module_s3
 from . import module_status
-from . import strings
\ No newline at end of file
+from . import strings
+from . import module_http
+from . import module_result_cache
+from . import module_metrics
+from . import module_throttle
+from . import module_token
+from . import module_lease
+# the modules needing numpy, pandas, pyarrow, geopandas or rasterio are not
+# imported here, to keep the cold start of the light entry points short:
+# module_rollup, module_dedup, module_stream, module_singleflight,
+# module_shm, module_pipeline, module_manifest, module_geoparquet,
+# module_query, module_records, module_cog
@@ -24,12 +24,15 @@
 # -------------------------------------------------------------------------------
 
 import os
+import stat
 import glob
 import shutil
+import getpass
 import datetime
 import tempfile
 import hashlib
 import platform
+from ..cli.module_log import Logger
 
 
 def now():
@@ -185,6 +188,37 @@ def tempdir(name=""):
     return foldername
 
 
+def private_dir(path):
+    """
+    private_dir - create path with mode 0700, PermissionError if it exists
+    and is a symlink, belongs to another user or is open to others
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if not hasattr(os, "getuid"):  # Windows, the temp dir is per user
+        return path
+    info = os.lstat(path)
+    if stat.S_ISLNK(info.st_mode) or not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"{path} is not a directory")
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"{path} belongs to another user")
+    if info.st_mode & 0o077:
+        raise PermissionError(f"{path} is accessible to other users")
+    return path
+
+
+def user_tempdir(name):
+    """
+    user_tempdir - the temporary directory {name}-{user}, private to the
+    user, or a new private one of this process if another user holds it
+    """
+    foldername = normpath(f"{tempfile.gettempdir()}/{name}-{getpass.getuser()}")
+    try:
+        return private_dir(foldername)
+    except PermissionError as ex:
+        Logger.warning("%s, using a temporary directory of this process", ex)
+        return normpath(tempfile.mkdtemp(prefix=f"{name}-"))
+
+
 def tempfilename(prefix="", suffix=""):
     """
     return a temporary filename
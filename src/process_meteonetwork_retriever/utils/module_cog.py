@@ -0,0 +1,139 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_cog.py
+# Purpose:     Cloud-Optimized GeoTIFF output of the gridded products
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import os
+import json
+import numpy as np
+import pandas as pd
+import rasterio
+from filelock import FileLock
+import rioxarray  # noqa: F401, registers the .rio accessor
+from .module_s3 import iss3, tmp, s3_upload, s3_get, s3_put
+from ..cli.module_log import Logger
+
+BLOCKSIZE = 512
+COMPRESS = "DEFLATE"
+# no .aux.xml next to the outputs, COGs carry their statistics inside
+GDAL_ENV = {"GDAL_PAM_ENABLED": "NO", "GDAL_NUM_THREADS": "ALL_CPUS"}
+
+
+def cog_options(dtype, compress=COMPRESS, resampling="average", blocksize=BLOCKSIZE):
+    """
+    cog_options - creation options of the GDAL COG driver for dtype
+    The horizontal differencing predictor suits integers, the floating
+    point one (3) the continuous fields like precipitation.
+    """
+    return {
+        "driver": "COG",
+        "COMPRESS": compress,
+        "PREDICTOR": "3" if np.issubdtype(np.dtype(dtype), np.floating) else "2",
+        "BLOCKSIZE": str(blocksize),
+        "OVERVIEWS": "AUTO",
+        "OVERVIEW_RESAMPLING": resampling,
+        "RESAMPLING": resampling,
+        "BIGTIFF": "IF_SAFER",
+    }
+
+
+def write_cog(da, uri, compress=COMPRESS, resampling="average", nodata=None, client=None):
+    """
+    write_cog - write a rioxarray DataArray as a Cloud-Optimized GeoTIFF
+    Internal tiles and overviews let tile servers read only the bytes they
+    need with http range requests. s3 uris are uploaded with s3_upload.
+    :return: the uri, None on failure
+    """
+    if nodata is not None:
+        da = da.rio.write_nodata(nodata, encoded=False)
+    filename = tmp(uri) if iss3(uri) else uri
+    if not iss3(uri) and os.path.dirname(uri):
+        os.makedirs(os.path.dirname(uri), exist_ok=True)
+    with rasterio.Env(**GDAL_ENV):
+        da.rio.to_raster(filename, **cog_options(da.dtype, compress, resampling))
+    if iss3(uri):
+        if not s3_upload(filename, uri, remove_src=True, client=client):
+            return None
+    Logger.debug("COG %s: %s %s", uri, da.shape, da.dtype)
+    return uri
+
+
+def _read_index(uri, client=None):
+    if iss3(uri):
+        body, etag = s3_get(uri, client=client)
+        return (json.loads(body), etag) if body is not None else ({"items": []}, None)
+    if not os.path.isfile(uri):
+        return {"items": []}, None
+    with open(uri, "r", encoding="utf-8") as stream:
+        return json.load(stream), None
+
+
+def _merge_items(items, new):
+    merged = {item["time"]: item for item in items} | {item["time"]: item for item in new}
+    return [merged[t] for t in sorted(merged)]
+
+
+def update_time_index(root, items, client=None, retries=5):
+    """
+    update_time_index - merge items into {root}/index.json, one per time
+    The index is the time-ordered mosaic of the COGs of a product.
+    """
+    uri = f"{root.rstrip('/')}/index.json"
+    if not iss3(uri):
+        os.makedirs(os.path.dirname(uri), exist_ok=True)
+        # read-merge-write under the lock, as the local manifest does
+        with FileLock(f"{uri}.lock"):
+            index, _ = _read_index(uri)
+            index["items"] = _merge_items(index["items"], items)
+            with open(f"{uri}.{os.getpid()}.tmp", "wb") as stream:
+                stream.write(json.dumps(index, indent=2).encode("utf-8"))
+            os.replace(f"{uri}.{os.getpid()}.tmp", uri)
+        return index
+    for _ in range(retries):
+        index, etag = _read_index(uri, client)
+        index["items"] = _merge_items(index["items"], items)
+        body = json.dumps(index, indent=2).encode("utf-8")
+        if s3_put(uri, body, if_match=etag, if_none_match=etag is None, client=client):
+            return index
+    raise RuntimeError(f"Could not update {uri}: too many concurrent writers")
+
+
+def write_cog_series(da, root, name, time_dim="time", compress=COMPRESS, resampling="average",
+                     nodata=None, client=None):
+    """
+    write_cog_series - one COG per time step of da, and their time index
+    Files are {root}/{name}_{YYYYmmddTHHMMSS}.tif.
+    :return: the time index
+    """
+    items = []
+    for value in da[time_dim].values:
+        when = pd.Timestamp(value)
+        uri = f"{root.rstrip('/')}/{name}_{when.strftime('%Y%m%dT%H%M%S')}.tif"
+        if write_cog(da.sel({time_dim: value}), uri, compress, resampling, nodata, client) is None:
+            continue
+        items.append({
+            "time": when.isoformat(),
+            "uri": uri,
+            "bbox": [float(v) for v in da.rio.bounds()],
+            "crs": da.rio.crs.to_string() if da.rio.crs else None,
+        })
+    return update_time_index(root, items, client)
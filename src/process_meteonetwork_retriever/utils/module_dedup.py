@@ -0,0 +1,166 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_dedup.py
+# Purpose:     Deduplication of observations by (station_id, variable, timestamp)
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import hashlib
+import numpy as np
+import pandas as pd
+from .module_s3 import copy, isfile
+from .module_rollup import KEYS
+from ..cli.module_log import Logger
+
+
+def _hash_labels(labels):
+    """
+    _hash_labels - stable 64 bit hash of each label
+    """
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(str(label).encode("utf-8"), digest_size=8).digest(), "little")
+         for label in labels],
+        dtype="uint64")
+
+
+def _mix(x):
+    """
+    _mix - splitmix64 finalizer, vectorised over an uint64 array
+    """
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def pack_keys(df):
+    """
+    pack_keys - pack (station_id, variable, timestamp) into one int64 per row
+    Labels are factorized first, so only the distinct stations and variables
+    are hashed; the cost per row is a few vectorised integer operations.
+    """
+    if len(df) == 0:
+        return np.empty(0, dtype="int64")
+    station_codes, stations = pd.factorize(df[KEYS[0]])
+    variable_codes, variables = pd.factorize(df[KEYS[1]])
+    seconds = pd.to_datetime(df[KEYS[2]], utc=True).to_numpy(dtype="datetime64[s]").astype("int64")
+
+    with np.errstate(over="ignore"):
+        h = _hash_labels(stations)[station_codes]
+        h = _mix(h ^ (_hash_labels(variables)[variable_codes] << np.uint64(1)))
+        h = _mix(h ^ seconds.astype("uint64"))
+    return h.view("int64")
+
+
+class DedupIndex:
+    """
+    DedupIndex - set of the packed keys already seen (8 bytes per key)
+    Keys are kept in sorted runs of doubling size, as a log-structured merge
+    tree: a lookup is a binary search per run and a batch is merged only
+    into the runs smaller than itself, so a batch costs O(batch log(index))
+    and not O(index).
+    """
+
+    def __init__(self, keys=None):
+        self.runs = []
+        if keys is not None:
+            self.add(np.asarray(keys, dtype="int64"))
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    @property
+    def keys(self):
+        """
+        keys - all the keys, sorted
+        """
+        return np.sort(np.concatenate(self.runs)) if self.runs else np.empty(0, dtype="int64")
+
+    def contains(self, keys):
+        """
+        contains - boolean mask of the keys already in the index
+        """
+        keys = np.asarray(keys, dtype="int64")
+        mask = np.zeros(len(keys), dtype=bool)
+        for run in self.runs:
+            pos = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+            mask |= run[pos] == keys
+        return mask
+
+    def add(self, keys):
+        """
+        add - insert keys not already in the index
+        """
+        run = np.unique(np.asarray(keys, dtype="int64"))
+        run = run[~self.contains(run)]
+        # merge with the last runs while they are not larger than the new one
+        while self.runs and len(self.runs[-1]) <= 2 * len(run):
+            run = np.sort(np.concatenate([self.runs.pop(), run]))
+        if len(run):
+            self.runs.append(run)
+        return self
+
+    def isin(self, df):
+        """
+        isin - boolean mask of the rows of df already in the index
+        """
+        if not self.runs:
+            return np.zeros(len(df), dtype=bool)
+        return self.contains(pack_keys(df))
+
+    def seed(self, df):
+        """
+        seed - add the keys of already stored observations
+        """
+        return self.add(pack_keys(df))
+
+    def seed_from(self, uri, client=None):
+        """
+        seed_from - add the keys of a stored partition (local or s3 parquet)
+        """
+        if isfile(uri):
+            df = pd.read_parquet(copy(uri, client=client), columns=KEYS)
+            self.seed(df)
+            Logger.debug("dedup index seeded from %s: %d keys", uri, len(self))
+        return self
+
+    def filter(self, df):
+        """
+        filter - drop the rows already seen, or repeated within df itself,
+        and add the remaining ones to the index
+        """
+        keys = pack_keys(df)
+        mask = ~pd.Series(keys).duplicated(keep="first").to_numpy()
+        mask &= ~self.contains(keys)
+        self.add(keys[mask])
+        Logger.debug("dedup: dropped %d of %d rows", len(df) - int(mask.sum()), len(df))
+        return df[mask]
+
+
+def deduplicate(df, seed_uri=None, client=None):
+    """
+    deduplicate - drop duplicated observations, optionally also those
+    already stored in the target partition seed_uri
+    """
+    index = DedupIndex()
+    if seed_uri:
+        index.seed_from(seed_uri, client=client)
+    return index.filter(df)
@@ -0,0 +1,91 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_geoparquet.py
+# Purpose:     Spatially sorted GeoParquet station outputs for bbox reads
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import os
+import numpy as np
+import geopandas as gpd
+from .module_s3 import iss3, upload, tmp
+from .module_manifest import file_stats, update_manifest
+from ..cli.module_log import Logger
+
+# rows per row group: with the rows in Hilbert order each row group holds
+# a few neighbouring stations, and its bbox covering stays small
+ROW_GROUP_ROWS = 8192
+HILBERT_LEVEL = 16
+
+
+def to_geodataframe(df, lon="longitude", lat="latitude", crs="EPSG:4326"):
+    """
+    to_geodataframe - point GeoDataFrame of a DataFrame with lon/lat columns
+    """
+    if isinstance(df, gpd.GeoDataFrame):
+        return df
+    return gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(df[lon], df[lat]), crs=crs)
+
+
+def spatial_sort(gdf, by=("station_id", "timestamp"), level=HILBERT_LEVEL):
+    """
+    spatial_sort - rows ordered by the Hilbert distance of their geometry
+    Rows of the same location are then ordered by the columns in by, so the
+    observations of a station stay contiguous and in time order.
+    """
+    if len(gdf) == 0:
+        return gdf
+    keys = [gdf[col].to_numpy() for col in reversed(by) if col in gdf.columns]
+    order = np.lexsort(keys + [gdf.hilbert_distance(level=level).to_numpy()])
+    return gdf.iloc[order].reset_index(drop=True)
+
+
+def write_geoparquet(data, uri, row_group_size=ROW_GROUP_ROWS, sort=True, root=None, client=None):
+    """
+    write_geoparquet - write station outputs as Hilbert sorted GeoParquet
+    Each row group gets a bbox covering column (GeoParquet 1.1), so readers
+    can skip the row groups outside of a bbox from their statistics.
+    :param root: dataset root whose manifest is updated with the new file
+    :return: the uri
+    """
+    gdf = to_geodataframe(data)
+    if sort:
+        gdf = spatial_sort(gdf)
+    filename = tmp(uri) if iss3(uri) else uri
+    if not iss3(uri) and os.path.dirname(uri):
+        os.makedirs(os.path.dirname(uri), exist_ok=True)
+    gdf.to_parquet(filename, index=False, compression="zstd", schema_version="1.1.0",
+                   write_covering_bbox=True, row_group_size=row_group_size)
+    stats = file_stats(gdf, os.path.getsize(filename))
+    if iss3(uri):
+        upload(filename, uri, client=client)  # raises before the manifest is updated
+    if root:
+        update_manifest(root, add={uri: stats}, client=client)
+    Logger.debug("%s: %d rows in row groups of %d", uri, len(gdf), row_group_size)
+    return uri
+
+
+def read_geoparquet(uri, bbox=None, columns=None, filters=None):
+    """
+    read_geoparquet - read a GeoParquet file, only the row groups in bbox
+    s3 uris are read in place with range requests, not downloaded.
+    :param bbox: (minx, miny, maxx, maxy)
+    """
+    return gpd.read_parquet(uri, bbox=bbox, columns=columns, filters=filters)
@@ -0,0 +1,343 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_http.py
+# Purpose:     HTTP layer for the MeteoNetwork API with an on-disk response cache
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import os
+import json
+import time
+import zlib
+import random
+import sqlite3
+import requests
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+from filelock import FileLock
+from requests.exceptions import RequestException, Timeout, ConnectionError
+from ..cli.module_log import Logger
+from .filesystem import private_dir, user_tempdir
+from .module_metrics import REGISTRY
+from .module_throttle import LIMITER, get_breaker, parse_retry_after
+from .module_token import get_token_manager
+
+API_URL = os.environ.get("METEONETWORK_API_URL", "https://api.meteonetwork.it/v3")
+
+# Per-endpoint freshness in seconds, it overrides the Cache-Control of the
+# response. The first path segment after the API root is matched.
+ENDPOINT_TTL = {
+    "stations": 24 * 3600,
+    "data-daily": 3600,
+    "data-realtime": 60,
+}
+
+CACHE_SIZE = 256 * 1024 * 1024
+
+HTTP_REQUESTS = REGISTRY.counter("meteonetwork_http_requests", "API requests by endpoint and status")
+HTTP_SECONDS = REGISTRY.histogram("meteonetwork_http_request_seconds", "Latency of the API requests")
+HTTP_BYTES = REGISTRY.counter("meteonetwork_http_bytes", "Bytes received from the API")
+HTTP_CACHE = REGISTRY.counter("meteonetwork_http_cache", "Response cache lookups by result")
+HTTP_RETRIES = REGISTRY.counter("meteonetwork_http_retries", "Retried API requests")
+
+RETRY_STATUS = (429, 502, 503, 504)
+
+
+def normalize_key(url, params=None):
+    """
+    normalize_key - cache key from the url and the query parameters
+    Scheme and host are lowercased and the parameters sorted, so the same
+    request gives the same key whatever the order of the params.
+    """
+    parts = urlparse(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += [(k, str(v)) for k, v in params.items() if v is not None]
+    query = urlencode(sorted(query))
+    path = parts.path.rstrip("/") or "/"
+    return urlunparse((parts.scheme.lower(), parts.netloc.lower(), path, "", query, ""))
+
+
+def endpoint(url):
+    """
+    endpoint - the first path segment of url after the API root
+    """
+    path = urlparse(url).path
+    root = urlparse(API_URL).path.rstrip("/")
+    if path.startswith(root):
+        path = path[len(root):]
+    return path.strip("/").split("/")[0]
+
+
+def endpoint_ttl(url):
+    """
+    endpoint_ttl - the ttl configured for the endpoint of url, or None
+    """
+    return ENDPOINT_TTL.get(endpoint(url))
+
+
+def cache_control_ttl(headers):
+    """
+    cache_control_ttl - the freshness allowed by the Cache-Control header
+    :return: seconds, 0 to revalidate every time, None if it must not be stored
+    """
+    directives = {}
+    for item in headers.get("Cache-Control", "").split(","):
+        key, _, value = item.strip().partition("=")
+        if key:
+            directives[key.lower()] = value.strip('"')
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+    for key in ("s-maxage", "max-age"):
+        if directives.get(key, "").isdigit():
+            return int(directives[key])
+    return 0
+
+
+class HttpCache:
+    """
+    HttpCache - SQLite response cache with compressed bodies and LRU eviction
+    The cached responses are served as they are, so the folder of the
+    database must be private to the user (see private_dir).
+    """
+
+    def __init__(self, path=None, max_size=CACHE_SIZE):
+        self.path = path or f"{user_tempdir(__package__)}/http_cache.sqlite"
+        self.max_size = max_size
+        private_dir(os.path.dirname(self.path))
+        self.lock = FileLock(f"{self.path}.lock")
+        with self.lock, self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    status INTEGER,
+                    headers TEXT,
+                    body BLOB,
+                    size INTEGER,
+                    expires REAL,
+                    accessed REAL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        """
+        get - the cached entry for key, or None
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT status, headers, body, expires FROM responses WHERE key=?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE responses SET accessed=? WHERE key=?", (time.time(), key))
+        status, headers, body, expires = row
+        return {
+            "status": status,
+            "headers": json.loads(headers),
+            "body": zlib.decompress(body),
+            "expires": expires,
+        }
+
+    def put(self, key, status, headers, body, ttl):
+        """
+        put - store a response, fresh for ttl seconds
+        """
+        data = zlib.compress(body)
+        now = time.time()
+        with self.lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, status, json.dumps(dict(headers)), data, len(data), now + ttl, now))
+            self._evict(conn)
+
+    def touch(self, key, ttl):
+        """
+        touch - a revalidated entry is fresh again for ttl seconds
+        """
+        now = time.time()
+        with self.lock, self._connect() as conn:
+            conn.execute("UPDATE responses SET expires=?, accessed=? WHERE key=?", (now + ttl, now, key))
+
+    def _evict(self, conn):
+        """
+        _evict - remove the least recently used entries beyond max_size
+        """
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size:
+            return
+        rows = conn.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall()
+        victims = []
+        for key, size in rows:
+            if total <= self.max_size:
+                break
+            victims.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key=?", victims)
+        Logger.debug("http cache: evicted %d entries", len(victims))
+
+    def clear(self):
+        """
+        clear - remove all the entries
+        """
+        with self.lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+
+_cache = None
+
+
+def get_cache():
+    """
+    get_cache - the default response cache of this process
+    """
+    global _cache
+    if _cache is None:
+        _cache = HttpCache()
+    return _cache
+
+
+def decode(body, mode):
+    """
+    decode - decode a response body as http_get does
+    """
+    if mode == "json":
+        return json.loads(body)
+    elif mode == "text":
+        return body.decode("utf-8")
+    return body
+
+
+def backoff(attempt):
+    """
+    backoff - exponential backoff with jitter, in seconds
+    """
+    return min(30.0, 0.5 * 2 ** attempt) * (0.5 + random.random())
+
+
+def api_request(method, url, retries=3, timeout=30, **kwargs):
+    """
+    api_request - send a request through the adaptive concurrency limit and
+    the circuit breaker of the endpoint, retrying 429/5xx and timeouts
+    Raises CircuitOpen, without sending, while the endpoint is failing.
+    :return: the last response, its content already read
+    """
+    name = endpoint(url)
+    breaker = get_breaker(name)
+    for attempt in range(retries + 1):
+        breaker.allow()
+        t = time.perf_counter()
+        try:
+            with LIMITER.slot():
+                response = requests.request(method, url, timeout=timeout, **kwargs)
+                _ = response.content
+        except (Timeout, ConnectionError) as ex:
+            HTTP_REQUESTS.inc(endpoint=name, status=type(ex).__name__)
+            LIMITER.on_overload()
+            breaker.on_failure()
+            if attempt == retries:
+                raise
+            HTTP_RETRIES.inc(endpoint=name)
+            time.sleep(backoff(attempt))
+            continue
+        except RequestException as ex:
+            # any other failure of the request, e.g. a broken chunked body
+            HTTP_REQUESTS.inc(endpoint=name, status=type(ex).__name__)
+            breaker.on_failure()
+            raise
+
+        latency = time.perf_counter() - t
+        HTTP_REQUESTS.inc(endpoint=name, status=response.status_code)
+        HTTP_SECONDS.observe(latency, endpoint=name)
+        HTTP_BYTES.inc(len(response.content), endpoint=name)
+
+        if response.status_code in RETRY_STATUS:
+            # the limiter pauses all the callers for Retry-After
+            LIMITER.on_overload(parse_retry_after(response.headers.get("Retry-After"), backoff(attempt)))
+            if response.status_code == 429:
+                breaker.on_success()  # throttled, but upstream is up
+            else:
+                breaker.on_failure()
+            if attempt < retries:
+                HTTP_RETRIES.inc(endpoint=name)
+                continue
+            return response
+
+        if response.status_code >= 500:
+            breaker.on_failure()
+        else:
+            breaker.on_success()
+            LIMITER.on_success(latency, name)
+        return response
+    return None
+
+
+def api_get(url, params=None, headers=None, mode="json", ttl=None, cache=None, timeout=30, retries=3, auth=True):
+    """
+    api_get - GET with the on-disk response cache
+    :param ttl: freshness in seconds, by default ENDPOINT_TTL or Cache-Control
+    :param cache: HttpCache to use, False to disable the cache
+    :param auth: send the shared MeteoNetwork access token
+    """
+    url = url if url.startswith("http") else f"{API_URL}/{url.lstrip('/')}"
+    cache = get_cache() if cache is None else cache
+    key = normalize_key(url, params)
+    ttl = ttl if ttl is not None else endpoint_ttl(url)
+
+    name = endpoint(url)
+    entry = cache.get(key) if cache else None
+    if entry and entry["expires"] > time.time():
+        HTTP_CACHE.inc(endpoint=name, result="hit")
+        return decode(entry["body"], mode)
+
+    headers = dict(headers or {})
+    if entry:
+        if entry["headers"].get("ETag"):
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+
+    try:
+        if auth and "Authorization" not in headers:
+            headers.update(get_token_manager().headers())
+        response = api_request("GET", url, retries=retries, timeout=timeout, params=params, headers=headers)
+        if response.status_code == 401 and auth and "Authorization" in headers:
+            # the shared token was revoked: refresh it once for everybody
+            get_token_manager().invalidate(headers["Authorization"].split(" ", 1)[-1])
+            headers.update(get_token_manager().headers())
+            response = api_request("GET", url, retries=retries, timeout=timeout, params=params, headers=headers)
+        if cache:
+            HTTP_CACHE.inc(endpoint=name, result="revalidated" if response.status_code == 304 else "miss")
+        if response.status_code == 304 and entry:
+            cache.touch(key, ttl if ttl is not None else cache_control_ttl(response.headers) or 0)
+            return decode(entry["body"], mode)
+        if response.status_code == 200:
+            fresh = ttl if ttl is not None else cache_control_ttl(response.headers)
+            if cache and fresh is not None:
+                stored = {k: v for k, v in response.headers.items()
+                          if k in ("Content-Type", "ETag", "Last-Modified", "Cache-Control")}
+                cache.put(key, response.status_code, stored, response.content, fresh)
+            return decode(response.content, mode)
+        Logger.error("GET %s: HTTP %s", url, response.status_code)
+    except RequestException as ex:
+        Logger.error(ex)
+    return None
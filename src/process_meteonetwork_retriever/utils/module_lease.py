@@ -0,0 +1,332 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_lease.py
+# Purpose:     Work units claimed with expiring leases by parallel workers
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import os
+import json
+import time
+import uuid
+import random
+import socket
+import hashlib
+import datetime
+import threading
+import contextlib
+from filelock import FileLock
+from .module_s3 import iss3, s3_get, s3_put, s3_exists, delete
+from .strings import listify
+from ..cli.module_log import Logger
+
+# A job root holds plan.json (the ids of the units), units/{id}.json,
+# leases/{id}.json while a worker owns a unit and done/{id}.json after.
+# failed/{id}.json counts the failed attempts of a unit.
+LEASE_TTL = 300
+UNIT_SIZE = 50
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 30
+
+
+class S3Backend:
+    """
+    S3Backend - small json objects with S3 conditional writes
+    """
+
+    def __init__(self, root, client=None):
+        self.root = root.rstrip("/")
+        self.client = client
+
+    def get(self, key):
+        body, etag = s3_get(f"{self.root}/{key}", client=self.client)
+        return (json.loads(body), etag) if body is not None else (None, None)
+
+    def put(self, key, data, if_match=None, if_none_match=False):
+        body = json.dumps(data).encode("utf-8")
+        return s3_put(f"{self.root}/{key}", body, if_match=if_match, if_none_match=if_none_match,
+                      client=self.client)
+
+    def exists(self, key):
+        return s3_exists(f"{self.root}/{key}", client=self.client)
+
+    def delete(self, key):
+        delete(f"{self.root}/{key}", client=self.client)
+
+
+class LocalBackend:
+    """
+    LocalBackend - the same semantics on a local folder, for tests and for
+    workers sharing a filesystem. The etag is the md5 of the content.
+    """
+
+    def __init__(self, root):
+        self.root = root.rstrip("/")
+
+    def _path(self, key):
+        return f"{self.root}/{key}"
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as stream:
+                body = stream.read()
+        except FileNotFoundError:
+            return None, None
+        return json.loads(body), hashlib.md5(body).hexdigest()
+
+    def put(self, key, data, if_match=None, if_none_match=False):
+        body = json.dumps(data).encode("utf-8")
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if if_none_match and not if_match:
+            # link a complete temporary file: readers never see it empty
+            tmpname = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmpname, "wb") as stream:
+                stream.write(body)
+            try:
+                os.link(tmpname, path)
+            except FileExistsError:
+                return None
+            finally:
+                os.unlink(tmpname)
+            return hashlib.md5(body).hexdigest()
+        with FileLock(f"{path}.lock"):
+            if if_match and self.get(key)[1] != if_match:
+                return None
+            with open(f"{path}.{os.getpid()}.tmp", "wb") as stream:
+                stream.write(body)
+            os.replace(f"{path}.{os.getpid()}.tmp", path)
+        return hashlib.md5(body).hexdigest()
+
+    def exists(self, key):
+        return os.path.isfile(self._path(key))
+
+    def delete(self, key):
+        if os.path.isfile(self._path(key)):
+            os.unlink(self._path(key))
+
+
+def get_backend(root, client=None):
+    """
+    get_backend - S3Backend for s3 roots, LocalBackend otherwise
+    """
+    return S3Backend(root, client) if iss3(root) else LocalBackend(root)
+
+
+def default_owner():
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class Lease:
+    """
+    Lease - exclusive, expiring ownership of a work unit
+    A free unit is claimed with a create-if-absent write, an expired lease
+    is taken over with a write conditional on its etag: of two workers
+    racing for the same unit exactly one wins.
+    """
+
+    def __init__(self, backend, unit_id, owner=None, ttl=LEASE_TTL):
+        self.backend = backend
+        self.unit_id = unit_id
+        self.owner = owner or default_owner()
+        self.ttl = ttl
+        self.etag = None
+
+    @property
+    def key(self):
+        return f"leases/{self.unit_id}.json"
+
+    def _data(self):
+        return {"owner": self.owner, "expires": time.time() + self.ttl}
+
+    def acquire(self):
+        """
+        acquire - True if this worker now owns the unit
+        """
+        current, etag = self.backend.get(self.key)
+        if current is None:
+            self.etag = self.backend.put(self.key, self._data(), if_none_match=True)
+        elif current["expires"] < time.time():
+            Logger.info("taking over unit %s from %s", self.unit_id, current["owner"])
+            self.etag = self.backend.put(self.key, self._data(), if_match=etag)
+        else:
+            self.etag = None
+        return self.etag is not None
+
+    def renew(self):
+        """
+        renew - extend the lease, False if it was lost to another worker
+        """
+        if self.etag is None:
+            return False
+        self.etag = self.backend.put(self.key, self._data(), if_match=self.etag)
+        if self.etag is None:
+            Logger.warning("lease of unit %s lost", self.unit_id)
+        return self.etag is not None
+
+    def release(self):
+        if self.etag is not None:
+            current, etag = self.backend.get(self.key)
+            if etag == self.etag:
+                self.backend.delete(self.key)
+            self.etag = None
+
+
+@contextlib.contextmanager
+def keep_alive(lease, interval=None):
+    """
+    keep_alive - renew the lease in background while the body runs
+    """
+    stop = threading.Event()
+    interval = interval or lease.ttl / 3
+
+    def renew():
+        while not stop.wait(interval):
+            if not lease.renew():
+                break
+
+    thread = threading.Thread(target=renew, daemon=True)
+    thread.start()
+    try:
+        yield lease
+    finally:
+        stop.set()
+        thread.join()
+
+
+def split_event(event, size=UNIT_SIZE, key="stations"):
+    """
+    split_event - one unit per block of size stations of the event
+    """
+    stations = list(listify(event.get(key), trim=True))
+    base = {k: v for k, v in event.items() if k not in ("mode", "lease_root", key)}
+    if not stations:
+        return [base]
+    return [base | {key: stations[i:i + size]} for i in range(0, len(stations), size)]
+
+
+def publish_units(root, units, client=None):
+    """
+    publish_units - write the units of a job and its plan
+    :return: the list of unit ids
+    """
+    backend = get_backend(root, client)
+    ids = [f"u{index:06d}" for index in range(len(units))]
+    for unit_id, unit in zip(ids, units):
+        backend.put(f"units/{unit_id}.json", unit)
+    backend.put("plan.json", {"units": ids, "created": datetime.datetime.now(datetime.timezone.utc).isoformat()})
+    Logger.info("published %d units in %s", len(ids), root)
+    return ids
+
+
+def record_failure(backend, unit_id, owner, error, backoff=RETRY_BACKOFF, retries=5):
+    """
+    record_failure - count a failed attempt of the unit
+    The next attempt is not before backoff * 2**(attempts - 1) seconds.
+    :return: the number of attempts so far
+    """
+    for _ in range(retries):
+        current, etag = backend.get(f"failed/{unit_id}.json")
+        attempts = (current or {}).get("attempts", 0) + 1
+        data = {"attempts": attempts, "owner": owner, "error": f"{error}",
+                "retry_after": time.time() + backoff * 2 ** (attempts - 1)}
+        if backend.put(f"failed/{unit_id}.json", data, if_match=etag, if_none_match=etag is None):
+            return attempts
+    return attempts
+
+
+def _retryable(backend, unit_id, max_attempts):
+    failed, _ = backend.get(f"failed/{unit_id}.json")
+    return failed is None or (failed["attempts"] < max_attempts and failed["retry_after"] <= time.time())
+
+
+def claim_next(backend, ids, owner=None, ttl=LEASE_TTL, max_attempts=MAX_ATTEMPTS):
+    """
+    claim_next - lease the first unit not done and not leased by others
+    Units that failed max_attempts times, or are waiting for their retry
+    backoff, are skipped. Workers start from a random unit so that they do
+    not all race for the same ones.
+    :return: (unit id, Lease) or (None, None)
+    """
+    start = random.randrange(len(ids)) if ids else 0
+    for unit_id in ids[start:] + ids[:start]:
+        if backend.exists(f"done/{unit_id}.json") or not _retryable(backend, unit_id, max_attempts):
+            continue
+        lease = Lease(backend, unit_id, owner, ttl)
+        if lease.acquire():
+            # the unit may have been completed since the check above
+            if backend.exists(f"done/{unit_id}.json"):
+                lease.release()
+                continue
+            return unit_id, lease
+    return None, None
+
+
+def run_worker(root, func, owner=None, ttl=LEASE_TTL, deadline=None, max_attempts=MAX_ATTEMPTS,
+               backoff=RETRY_BACKOFF, client=None):
+    """
+    run_worker - process the units of a job until none is left to claim
+    A unit is marked done, once, only after func returned; the units of a
+    crashed worker are taken over when their lease expires. A unit whose
+    func raises is retried with exponential backoff, up to max_attempts.
+    :param func: function unit -> json-serializable result
+    :param deadline: time.time() after which no new unit is claimed
+    :return: dict unit id -> result of the units processed here
+    """
+    backend = get_backend(root, client)
+    plan, _ = backend.get("plan.json")
+    ids = plan["units"] if plan else []
+    owner = owner or default_owner()
+    results = {}
+    while deadline is None or time.time() < deadline:
+        unit_id, lease = claim_next(backend, ids, owner, ttl, max_attempts)
+        if unit_id is None:
+            break
+        unit, _ = backend.get(f"units/{unit_id}.json")
+        try:
+            with keep_alive(lease):
+                res = func(unit)
+            if backend.put(f"done/{unit_id}.json", {"owner": owner, "result": res}, if_none_match=True):
+                results[unit_id] = res
+        except Exception as ex:
+            attempts = record_failure(backend, unit_id, owner, ex, backoff)
+            Logger.error("unit %s failed (attempt %d of %d): %s", unit_id, attempts, max_attempts, ex)
+        finally:
+            lease.release()
+    return results
+
+
+def job_status(root, max_attempts=MAX_ATTEMPTS, client=None):
+    """
+    job_status - number of units done, failed for good and pending
+    """
+    backend = get_backend(root, client)
+    plan, _ = backend.get("plan.json")
+    ids = plan["units"] if plan else []
+    done, failed = 0, []
+    for unit_id in ids:
+        if backend.exists(f"done/{unit_id}.json"):
+            done += 1
+            continue
+        failure, _ = backend.get(f"failed/{unit_id}.json")
+        if failure and failure["attempts"] >= max_attempts:
+            failed.append(unit_id)
+    return {"units": len(ids), "done": done, "failed": len(failed),
+            "pending": len(ids) - done - len(failed), "failed_units": failed}
@@ -0,0 +1,321 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_manifest.py
+# Purpose:     Partition manifest of a dataset root, to plan reads without LIST
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import os
+import json
+import time
+import datetime
+from urllib.parse import urlparse
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from filelock import FileLock
+from .module_s3 import copy, iss3, s3_get, s3_put, s3_list, delete
+from ..cli.module_log import Logger
+
+# The manifest of a root lives in {root}/_manifest: latest.json is the
+# current version, the only object a reader has to GET, and vNNNNNNNN.json
+# are the snapshots of the previous versions.
+MANIFEST_DIR = "_manifest"
+KEEP_SNAPSHOTS = 20
+COMMIT_RETRIES = 10
+
+TIME_COLUMN = "timestamp"
+STATION_COLUMN = "station_id"
+COORD_COLUMNS = (("lon", "lat"), ("longitude", "latitude"), ("x", "y"))
+
+
+def manifest_uri(root, name="latest.json"):
+    return f"{root.rstrip('/')}/{MANIFEST_DIR}/{name}"
+
+
+def snapshot_name(version):
+    return f"v{version:08d}.json"
+
+
+def list_files(root, client=None):
+    """
+    list_files - the parquet data files under root, with their size
+    Files and folders starting with _ or . are ignored, as pyarrow datasets do.
+    :return: list of (file uri, size)
+    """
+    root = root.rstrip("/")
+    files = []
+    if iss3(root):
+        bucket = urlparse(root).netloc
+        for obj in s3_list(root, client=client, retrieve_properties=["Size"]):
+            files.append((f"s3://{bucket}/{obj['Key']}", obj["Size"]))
+    else:
+        for folder, _, names in os.walk(root):
+            folder = folder.replace("\\", "/")
+            files += [(f"{folder}/{name}", os.path.getsize(f"{folder}/{name}")) for name in names]
+    return [(uri, size) for uri, size in files
+            if uri.endswith(".parquet") and not any(
+                part.startswith(("_", ".")) for part in uri[len(root) + 1:].split("/"))]
+
+
+def _columns(data):
+    return data.column_names if isinstance(data, pa.Table) else list(data.columns)
+
+
+def _min_max(data, name):
+    if isinstance(data, pa.Table):
+        res = pc.min_max(data[name])
+        return res["min"].as_py(), res["max"].as_py()
+    return data[name].min(), data[name].max()
+
+
+def _isoformat(value):
+    return None if value is None or pd.isna(value) else pd.to_datetime(value, utc=True).isoformat()
+
+
+def file_stats(data, size=None):
+    """
+    file_stats - manifest entry of a file: rows, size, time range, stations
+    and bbox, from the DataFrame or Arrow table being written
+    """
+    columns = _columns(data)
+    res = {"rows": len(data), "size": size, "time_min": None, "time_max": None, "stations": [], "bbox": None}
+    if len(data) == 0:
+        return res
+    if TIME_COLUMN in columns:
+        tmin, tmax = _min_max(data, TIME_COLUMN)
+        res["time_min"], res["time_max"] = _isoformat(tmin), _isoformat(tmax)
+    if STATION_COLUMN in columns:
+        values = pc.unique(data[STATION_COLUMN]).to_pylist() if isinstance(data, pa.Table) \
+            else data[STATION_COLUMN].unique().tolist()
+        res["stations"] = sorted(str(v) for v in values if v is not None)
+    if hasattr(data, "total_bounds") and getattr(data, "geometry", None) is not None:
+        res["bbox"] = [float(v) for v in data.total_bounds]
+    else:
+        for x, y in COORD_COLUMNS:
+            if x in columns and y in columns:
+                (xmin, xmax), (ymin, ymax) = _min_max(data, x), _min_max(data, y)
+                res["bbox"] = [float(xmin), float(ymin), float(xmax), float(ymax)]
+                break
+    return res
+
+
+def _summarize(partition):
+    """
+    _summarize - partition rows, time range, stations and bbox from its files
+    """
+    files = partition["files"].values()
+    tmin = [f["time_min"] for f in files if f.get("time_min")]
+    tmax = [f["time_max"] for f in files if f.get("time_max")]
+    bboxes = [f["bbox"] for f in files if f.get("bbox")]
+    partition["rows"] = sum(f.get("rows") or 0 for f in files)
+    partition["time_min"] = min(tmin) if tmin else None
+    partition["time_max"] = max(tmax) if tmax else None
+    partition["stations"] = sorted(set().union(*(f.get("stations") or [] for f in files)))
+    partition["bbox"] = [min(b[0] for b in bboxes), min(b[1] for b in bboxes),
+                         max(b[2] for b in bboxes), max(b[3] for b in bboxes)] if bboxes else None
+    return partition
+
+
+def _split(root, uri):
+    """
+    _split - (partition key, file name) of uri relative to root
+    """
+    partition, _, name = uri[len(root.rstrip("/")) + 1:].rpartition("/")
+    return partition, name
+
+
+def _join(root, key, name):
+    return f"{root.rstrip('/')}/{key}/{name}" if key else f"{root.rstrip('/')}/{name}"
+
+
+def _read(root, name="latest.json", client=None):
+    """
+    _read - (manifest, etag) of root, (None, None) if missing
+    The etag of a local manifest is its version.
+    """
+    uri = manifest_uri(root, name)
+    if iss3(uri):
+        body, etag = s3_get(uri, client=client)
+        return (json.loads(body), etag) if body is not None else (None, None)
+    if not os.path.isfile(uri):
+        return None, None
+    with open(uri, "r", encoding="utf-8") as stream:
+        manifest = json.load(stream)
+    return manifest, manifest["version"]
+
+
+def _write_local(uri, body):
+    os.makedirs(os.path.dirname(uri), exist_ok=True)
+    with open(f"{uri}.{os.getpid()}.tmp", "wb") as stream:
+        stream.write(body)
+    os.replace(f"{uri}.{os.getpid()}.tmp", uri)
+
+
+def _commit(root, manifest, etag, client=None):
+    """
+    _commit - publish manifest only if latest.json is still at etag
+    """
+    uri = manifest_uri(root)
+    body = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+    if iss3(uri):
+        return s3_put(uri, body, if_match=etag, if_none_match=etag is None, client=client) is not None
+    os.makedirs(os.path.dirname(uri), exist_ok=True)
+    with FileLock(f"{uri}.lock"):
+        _, current = _read(root)
+        if current != etag:
+            return False
+        _write_local(uri, body)
+    return True
+
+
+def _snapshot(root, manifest, client=None):
+    """
+    _snapshot - keep a copy of the committed version, drop the oldest one
+    """
+    uri = manifest_uri(root, snapshot_name(manifest["version"]))
+    body = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+    if iss3(uri):
+        s3_put(uri, body, client=client)
+    else:
+        _write_local(uri, body)
+    old = manifest["version"] - KEEP_SNAPSHOTS
+    if old > 0:
+        old_uri = manifest_uri(root, snapshot_name(old))
+        if iss3(old_uri) or os.path.isfile(old_uri):
+            delete(old_uri, client=client)
+
+
+def load_manifest(root, version=None, client=None):
+    """
+    load_manifest - the current manifest of root, or the snapshot of version
+    One GET, None if the root has no manifest.
+    """
+    name = snapshot_name(version) if version else "latest.json"
+    manifest, _ = _read(root, name, client=client)
+    return manifest
+
+
+def update_manifest(root, add=None, remove=None, client=None):
+    """
+    update_manifest - add and remove files in one transaction
+    Concurrent writers are serialized with a conditional write of
+    latest.json (S3 If-Match, or a FileLock on local roots): on a conflict
+    the changes are re-applied to the newer manifest.
+    :param add: dict file uri -> file_stats of the written data
+    :param remove: file uris no longer part of the dataset
+    :return: the committed manifest
+    """
+    root = root.rstrip("/")
+    for attempt in range(COMMIT_RETRIES):
+        manifest, etag = _read(root, client=client)
+        manifest = manifest or {"format": 1, "version": 0, "root": root, "partitions": {}}
+        partitions = manifest["partitions"]
+        touched = set()
+        for uri in remove or []:
+            key, name = _split(root, uri)
+            if name in partitions.get(key, {}).get("files", {}):
+                del partitions[key]["files"][name]
+                touched.add(key)
+        for uri, entry in (add or {}).items():
+            key, name = _split(root, uri)
+            partitions.setdefault(key, {"files": {}})["files"][name] = entry
+            touched.add(key)
+        for key in touched:
+            if partitions[key]["files"]:
+                _summarize(partitions[key])
+            else:
+                del partitions[key]
+
+        manifest["version"] += 1
+        manifest["updated"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        if _commit(root, manifest, etag, client=client):
+            _snapshot(root, manifest, client=client)
+            Logger.debug("manifest %s: version %d", root, manifest["version"])
+            return manifest
+        time.sleep(0.05 * (attempt + 1))
+    raise RuntimeError(f"Could not update the manifest of {root}: too many concurrent writers")
+
+
+def rebuild_manifest(root, files=None, client=None):
+    """
+    rebuild_manifest - build the manifest of an existing root from a listing
+    The only place where a LIST is needed, once per dataset.
+    :param files: list of (file uri, size), by default list_files(root)
+    """
+    files = files if files is not None else list_files(root, client=client)
+    add = {}
+    for uri, size in files:
+        filename = copy(uri, client=client) if iss3(uri) else uri
+        schema = pq.read_schema(filename)
+        columns = [c for c in schema.names if c in (TIME_COLUMN, STATION_COLUMN) or
+                   any(c in pair for pair in COORD_COLUMNS)]
+        add[uri] = file_stats(pq.read_table(filename, columns=columns), size)
+    manifest, _ = _read(root, client=client)
+    remove = [_join(root, key, name) for key, partition in (manifest or {}).get("partitions", {}).items()
+              for name in partition["files"]]
+    return update_manifest(root, add=add, remove=remove, client=client)
+
+
+def _overlaps(entry, start, end, stations, bbox):
+    if start is not None and entry.get("time_max") and entry["time_max"] < start:
+        return False
+    if end is not None and entry.get("time_min") and entry["time_min"] > end:
+        return False
+    if stations is not None and entry.get("stations") and not stations.intersection(entry["stations"]):
+        return False
+    if bbox is not None and entry.get("bbox"):
+        b = entry["bbox"]
+        if b[2] < bbox[0] or b[0] > bbox[2] or b[3] < bbox[1] or b[1] > bbox[3]:
+            return False
+    return True
+
+
+def prune(manifest, start=None, end=None, stations=None, bbox=None):
+    """
+    prune - the files of the manifest that may contain matching rows
+    Partitions are pruned first, then their files, on time range, stations
+    and bbox [minx, miny, maxx, maxy].
+    :return: list of file uris
+    """
+    start = _isoformat(start) if start is not None else None
+    end = _isoformat(end) if end is not None else None
+    stations = {str(s) for s in stations} if stations is not None else None
+    root = manifest["root"]
+    res = []
+    for key, partition in sorted(manifest["partitions"].items()):
+        if not _overlaps(partition, start, end, stations, bbox):
+            continue
+        res += [_join(root, key, name) for name, entry in sorted(partition["files"].items())
+                if _overlaps(entry, start, end, stations, bbox)]
+    return res
+
+
+def plan(root, start=None, end=None, stations=None, bbox=None, client=None):
+    """
+    plan - the files of root to read for a query, from the manifest
+    Falls back to a LIST of the root when there is no manifest yet.
+    """
+    manifest = load_manifest(root, client=client)
+    if manifest is None:
+        Logger.warning("%s has no manifest, listing it", root)
+        return [uri for uri, _ in list_files(root, client=client)]
+    return prune(manifest, start, end, stations, bbox)
@@ -0,0 +1,223 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_metrics.py
+# Purpose:     In-process metrics registry with OpenMetrics/json export
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import os
+import bisect
+import functools
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _labels_text(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in key) + "}"
+
+
+class Metric:
+    """
+    Metric - a named family of values, one per set of labels
+    """
+    kind = "unknown"
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self.values = {}
+        self.lock = threading.Lock()
+
+
+class Counter(Metric):
+    """
+    Counter - monotonically increasing value
+    """
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = _labels_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        return [(f"{self.name}_total", key, value) for key, value in self.values.items()]
+
+
+class Gauge(Metric):
+    """
+    Gauge - value that can go up and down
+    """
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[_labels_key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = _labels_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        return [(self.name, key, value) for key, value in self.values.items()]
+
+
+class Histogram(Metric):
+    """
+    Histogram - distribution of observed values over fixed buckets
+    """
+    kind = "histogram"
+
+    def __init__(self, name, help="", buckets=LATENCY_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = _labels_key(labels)
+        with self.lock:
+            counts, total, count = self.values.get(key, ([0] * (len(self.buckets) + 1), 0.0, 0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.values[key] = (counts, total + value, count + 1)
+
+    def samples(self):
+        res = []
+        for key, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                res.append((f"{self.name}_bucket", key + (("le", le),), cumulative))
+            res.append((f"{self.name}_sum", key, total))
+            res.append((f"{self.name}_count", key, count))
+        return res
+
+
+class Registry:
+    """
+    Registry - the metrics of the process
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _get(self, cls, name, help, **kwargs):
+        with self.lock:
+            if name not in self.metrics:
+                self.metrics[name] = cls(name, help, **kwargs)
+            return self.metrics[name]
+
+    def counter(self, name, help=""):
+        return self._get(Counter, name, help)
+
+    def gauge(self, name, help=""):
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name, help="", buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def reset(self):
+        """
+        reset - zero all the metrics, e.g. between two warm Lambda invocations
+        """
+        with self.lock:
+            for metric in self.metrics.values():
+                with metric.lock:
+                    metric.values = {}
+
+    def to_openmetrics(self):
+        """
+        to_openmetrics - the OpenMetrics text exposition
+        """
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            with metric.lock:
+                samples = metric.samples()
+            for name, key, value in samples:
+                lines.append(f"{name}{_labels_text(key)} {value}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self):
+        """
+        to_json - json-serializable dict of the metrics, for the Lambda result
+        """
+        res = {}
+        for metric in list(self.metrics.values()):
+            with metric.lock:
+                samples = metric.samples()
+            res[metric.name] = [{"name": name, "labels": dict(key), "value": value}
+                                for name, key, value in samples]
+        return res
+
+    def write_openmetrics(self, filename):
+        """
+        write_openmetrics - write the exposition atomically, e.g. for the
+        node_exporter textfile collector of long-running workers
+        """
+        with open(f"{filename}.tmp", "w", encoding="utf-8") as stream:
+            stream.write(self.to_openmetrics())
+        os.replace(f"{filename}.tmp", filename)
+        return filename
+
+
+REGISTRY = Registry()
+
+
+def instrument(operation, check=None, prefix="meteonetwork"):
+    """
+    instrument - decorator counting the calls by outcome and the latency of
+    operation. The outcome is error if the call raises, or if check(result)
+    is False; by default a result of False or None is an error, as the s3
+    helpers report failures that way.
+    """
+    calls = REGISTRY.counter(f"{prefix}_operations", "Operations by name and outcome")
+    latency = REGISTRY.histogram(f"{prefix}_operation_seconds", "Latency of the operations")
+    check = check or (lambda res: res is not False and res is not None)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            t = time.perf_counter()
+            outcome = "error"
+            try:
+                res = func(*args, **kwargs)
+                outcome = "ok" if check(res) else "error"
+                return res
+            finally:
+                calls.inc(operation=operation, outcome=outcome)
+                latency.observe(time.perf_counter() - t, operation=operation)
+        return wrapper
+    return decorator
@@ -0,0 +1,380 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_pipeline.py
+# Purpose:     Memory-budgeted pipeline with spill-to-disk between stages
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import os
+import sys
+import time
+import queue
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from .module_s3 import tmp, upload
+from .module_metrics import REGISTRY
+from ..cli.module_log import Logger
+
+_DONE = object()
+
+STAGE_UTILISATION = REGISTRY.gauge("meteonetwork_pipeline_stage_utilisation", "Busy fraction of the pipeline stages")
+
+
+def default_budget():
+    """
+    default_budget - bytes of batches kept in memory between the stages
+    MEMORY_BUDGET_MB if set, else half of the Lambda memory, else 1 GB
+    """
+    if os.environ.get("MEMORY_BUDGET_MB"):
+        return int(os.environ["MEMORY_BUDGET_MB"]) * 1024 * 1024
+    if os.environ.get("AWS_LAMBDA_FUNCTION_MEMORY_SIZE"):
+        return int(os.environ["AWS_LAMBDA_FUNCTION_MEMORY_SIZE"]) * 1024 * 1024 // 2
+    return 1024 * 1024 * 1024
+
+
+def nbytes(batch):
+    """
+    nbytes - approximate memory of a batch
+    """
+    if isinstance(batch, pd.DataFrame):
+        return int(batch.memory_usage(deep=True).sum())
+    if isinstance(batch, (np.ndarray, pa.Table, pa.RecordBatch)):
+        return int(batch.nbytes)
+    return sys.getsizeof(batch)
+
+
+class MemoryBudget:
+    """
+    MemoryBudget - bytes of batches held in memory by the pipeline queues
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit or default_budget()
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def reserve(self, size):
+        """
+        reserve - True if size bytes fit in the budget, and reserve them
+        """
+        with self.lock:
+            if self.used + size > self.limit:
+                return False
+            self.used += size
+            return True
+
+    def release(self, size):
+        with self.lock:
+            self.used -= size
+
+
+def spill(batch):
+    """
+    spill - write a batch to the job workspace
+    DataFrames and Arrow tables as Arrow IPC, arrays as .npy
+    """
+    if isinstance(batch, np.ndarray):
+        filename = tmp("spill.npy")
+        np.save(filename, batch)
+        return "npy", filename
+    table = batch if isinstance(batch, pa.Table) else pa.Table.from_pandas(batch, preserve_index=False)
+    filename = tmp("spill.arrow")
+    with pa.OSFile(filename, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return "arrow" if isinstance(batch, pa.Table) else "pandas", filename
+
+
+def unspill(kind, filename):
+    """
+    unspill - read back a spilled batch, memory mapped where possible
+    """
+    if kind == "npy":
+        batch = np.load(filename, mmap_mode="r")
+    else:
+        with pa.memory_map(filename, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        batch = table if kind == "arrow" else table.to_pandas()
+    if os.name != "nt":  # the mapping keeps the data alive on unix
+        os.unlink(filename)
+    return batch
+
+
+class SpillQueue:
+    """
+    SpillQueue - bounded queue of batches, spilled to disk beyond the budget
+    put() blocks while the queue is full, so the producers slow down to the
+    pace of the consumers instead of growing the memory.
+    """
+
+    def __init__(self, maxsize=4, budget=None):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.budget = budget or MemoryBudget()
+        self.spilled = 0
+
+    def put(self, batch, stop=None):
+        """
+        put - queue a batch, blocking while the queue is full
+        With the Event stop, the batch is dropped once stop is set.
+        :return: True if the batch was queued
+        """
+        if batch is _DONE:
+            item = (None, _DONE, 0)
+        else:
+            size = nbytes(batch)
+            if self.budget.reserve(size):
+                item = ("memory", batch, size)
+            else:
+                self.spilled += 1
+                Logger.debug("spilling a batch of %d bytes to disk", size)
+                item = spill(batch) + (0,)
+        while True:
+            try:
+                self.queue.put(item, timeout=None if stop is None else 0.1)
+                return True
+            except queue.Full:
+                if stop.is_set():
+                    self._drop(item)
+                    return False
+
+    def get(self, stop=None):
+        """
+        get - the next batch, _DONE at the end or, with the Event stop,
+        once stop is set and the queue is empty
+        """
+        while True:
+            try:
+                where, item, size = self.queue.get(timeout=None if stop is None else 0.1)
+                break
+            except queue.Empty:
+                if stop.is_set():
+                    return _DONE
+        if item is _DONE:
+            return _DONE
+        if where == "memory":
+            self.budget.release(size)
+            return item
+        return unspill(where, item)
+
+    def _drop(self, item):
+        where, batch, size = item
+        if where == "memory":
+            self.budget.release(size)
+        elif where is not None and os.path.isfile(batch):
+            os.unlink(batch)
+
+    def discard(self):
+        """
+        discard - drop the batches left in the queue, and their spill files
+        """
+        while True:
+            try:
+                self._drop(self.queue.get_nowait())
+            except queue.Empty:
+                return
+
+
+class Stage:
+    """
+    Stage - a function batch -> batch run by workers threads
+    None drops the batch. maxsize bounds the queue of its results, so a
+    stage runs at most maxsize batches ahead of the next one.
+    """
+
+    def __init__(self, func, name=None, workers=1, maxsize=None):
+        self.func = func
+        self.name = name or getattr(func, "__name__", "stage")
+        self.workers = workers
+        self.maxsize = maxsize
+
+
+class StageStats:
+    """
+    StageStats - busy and blocked time of the workers of a stage
+    """
+
+    def __init__(self, name, workers=1):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.blocked = 0.0  # waiting for a full downstream queue
+        self.lock = threading.Lock()
+
+    def add(self, busy=0.0, blocked=0.0, items=0):
+        with self.lock:
+            self.busy += busy
+            self.blocked += blocked
+            self.items += items
+
+
+class PipelineStats:
+    """
+    PipelineStats - per-stage utilisation of a pipeline run
+    The utilisation of a stage is the fraction of the wall time its workers
+    spent working: the slowest stage is close to 1, the others wait for it.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.elapsed = 0.0
+        self.spilled = 0
+
+    def to_dict(self):
+        wall = self.elapsed or float("nan")
+        return {
+            "elapsed": round(self.elapsed, 3),
+            "spilled": self.spilled,
+            "stages": [{
+                "name": stage.name,
+                "workers": stage.workers,
+                "items": stage.items,
+                "busy": round(stage.busy, 3),
+                "blocked": round(stage.blocked, 3),
+                "utilisation": round(stage.busy / (wall * stage.workers), 3),
+            } for stage in self.stages],
+        }
+
+
+def _put(out, batch, stats, stop):
+    t = time.perf_counter()
+    out.put(batch, stop)
+    stats.add(blocked=time.perf_counter() - t)
+
+
+def _feed(source, out, errors, stats, stop):
+    try:
+        iterator = iter(source)
+        while not errors and not stop.is_set():
+            t = time.perf_counter()
+            batch = next(iterator, _DONE)
+            if batch is _DONE:
+                break
+            stats.add(busy=time.perf_counter() - t, items=1)
+            _put(out, batch, stats, stop)
+    except Exception as ex:
+        errors.append(ex)
+    finally:
+        out.put(_DONE, stop)
+
+
+def _stage(stage, inp, out, errors, stats, running, stop):
+    try:
+        while True:
+            batch = inp.get(stop)
+            if batch is _DONE:
+                inp.put(_DONE, stop)  # let the other workers of the stage stop too
+                break
+            if errors or stop.is_set():
+                continue  # drain, so that the upstream is not blocked
+            t = time.perf_counter()
+            try:
+                res = stage.func(batch)
+            except Exception as ex:
+                errors.append(ex)
+                continue
+            stats.add(busy=time.perf_counter() - t, items=1)
+            if res is not None:
+                _put(out, res, stats, stop)
+    finally:
+        with stats.lock:
+            running[0] -= 1
+            last = running[0] == 0
+        if last:
+            out.put(_DONE, stop)
+
+
+def upload_stage(uri_of, workers=2, client=None):
+    """
+    upload_stage - Stage writing each batch to uri_of(batch) (local or s3)
+    in background, DataFrames and Arrow tables as parquet, arrays as .npy
+    :return: the Stage, its results are the written uris, a failed upload
+        raises from the pipeline
+    """
+    def write(batch):
+        uri = uri_of(batch)
+        fileout = tmp(uri)
+        if isinstance(batch, np.ndarray):
+            np.save(fileout, batch)
+        elif isinstance(batch, pa.Table):
+            pq.write_table(batch, fileout)
+        else:
+            batch.to_parquet(fileout, index=False)
+        try:
+            return upload(fileout, uri, client=client)
+        finally:
+            if os.path.isfile(fileout):
+                os.unlink(fileout)
+    return Stage(write, name="upload", workers=workers)
+
+
+def pipeline(source, *stages, budget=None, maxsize=4, stats=None):
+    """
+    pipeline - run source -> stage -> ... -> stage under a memory budget
+    Each stage runs in its own threads: while a batch is processed the
+    source prefetches the next ones and the finished ones are uploaded, so
+    the run takes about as long as its slowest stage. Stages are functions
+    batch -> batch or Stage objects, connected by SpillQueues that share
+    the same budget. If the consumer stops early (close, break or an
+    exception) the threads are stopped and the queued batches dropped.
+    :param stats: PipelineStats filled with the per-stage utilisation
+    :return: generator of the batches out of the last stage
+    """
+    t = time.perf_counter()
+    stages = [stage if isinstance(stage, Stage) else Stage(stage) for stage in stages]
+    stats = stats if stats is not None else PipelineStats()
+    stats.stages = [StageStats("source")] + [StageStats(stage.name, stage.workers) for stage in stages]
+    budget = budget if isinstance(budget, MemoryBudget) else MemoryBudget(budget)
+    queues = [SpillQueue(maxsize, budget)] + [SpillQueue(stage.maxsize or maxsize, budget) for stage in stages]
+    errors = []
+    stop = threading.Event()
+    threads = [threading.Thread(target=_feed, args=(source, queues[0], errors, stats.stages[0], stop), daemon=True)]
+    for i, stage in enumerate(stages):
+        running = [stage.workers]
+        threads += [threading.Thread(target=_stage, daemon=True,
+                                     args=(stage, queues[i], queues[i + 1], errors, stats.stages[i + 1], running, stop))
+                    for _ in range(stage.workers)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            batch = queues[-1].get()
+            if batch is _DONE:
+                break
+            yield batch
+    finally:
+        # the threads are done unless the consumer stopped early
+        stop.set()
+        for thread in threads:
+            thread.join()
+        for q in queues:
+            q.discard()
+    stats.elapsed = time.perf_counter() - t
+    stats.spilled = sum(q.spilled for q in queues)
+    for stage in stats.to_dict()["stages"]:
+        STAGE_UTILISATION.set(stage["utilisation"], stage=stage["name"])
+    Logger.debug("pipeline: %s", stats.to_dict())
+    if stats.spilled:
+        Logger.info("pipeline: %d batches spilled to disk (budget %d MB)", stats.spilled, budget.limit // 2**20)
+    if errors:
+        raise errors[0]
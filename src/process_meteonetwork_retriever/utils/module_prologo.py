@@ -26,12 +26,13 @@
 import os
 import sys
 import logging
-from ..cli.module_log import Logger
+from ..cli.module_log import Logger, set_log_context, clear_job_log, get_job_log, flush_log
 from ..cli.module_version import get_version
 from ..cli.module_logo import logo
 from .filesystem import now,total_seconds_from
-from .module_s3 import clean
+from .module_s3 import clean, copy, tmp
 from .module_status import set_status
+from .module_metrics import REGISTRY
 
 def prologo(backend, jid, version, verbose, debug):
     """
@@ -41,6 +42,8 @@ def prologo(backend, jid, version, verbose, debug):
     jid = jid or os.getpid()
 
     os.environ[f"{__package__}-JID"] = str(jid)
+    set_log_context(jid=str(jid))
+    clear_job_log()
     
     if verbose:
         Logger.setLevel(logging.INFO)
@@ -60,10 +63,25 @@ def prologo(backend, jid, version, verbose, debug):
 
 
 
-def epilogo(t, backend, jid):
+def flush_job_log(uri):
     """
-    epilogo - print the epilogo
+    flush_job_log - upload the log records buffered for the job to uri
     """
+    filename = tmp(uri)
+    with open(filename, "w", encoding="utf-8") as stream:
+        stream.write(get_job_log())
+    return copy(filename, uri)
+
 
+def epilogo(t, backend, jid, log_uri=None):
+    """
+    epilogo - print the epilogo
+    """
+    if log_uri:
+        flush_job_log(log_uri)
     clean()
-    set_status(backend, jid, 100, f"Job completed in {total_seconds_from(t):.2f}s.")
\ No newline at end of file
+    set_status(backend, jid, 100, f"Job completed in {total_seconds_from(t):.2f}s.")
+    # long-running workers expose the metrics to a textfile collector
+    if os.environ.get("METRICS_FILE"):
+        REGISTRY.write_openmetrics(os.environ["METRICS_FILE"])
+    flush_log()
\ No newline at end of file
@@ -0,0 +1,189 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_query.py
+# Purpose:     Serve observations from the stored partitions, the API fills the gaps
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+from .module_s3 import iss3
+from .module_manifest import plan, COORD_COLUMNS
+from .module_rollup import KEYS
+from .module_dedup import deduplicate
+from .module_singleflight import work_units, fetch_units, UNIT_WINDOW
+from .module_metrics import REGISTRY
+from ..cli.module_log import Logger
+
+QUERY_ROWS = REGISTRY.counter("meteonetwork_query_rows", "Rows served by source")
+
+# columns of the GeoParquet outputs not returned in long format
+SKIP_COLUMNS = ("geometry", "bbox")
+
+
+def _timestamp(value, type):
+    """
+    _timestamp - scalar comparable with a timestamp column of type
+    """
+    value = pd.Timestamp(value)
+    value = value.tz_localize("UTC") if value.tzinfo is None else value.tz_convert("UTC")
+    if getattr(type, "tz", None) is None:
+        value = value.tz_localize(None)
+    return pa.scalar(value, type=type)
+
+
+def filter_expression(schema, start=None, end=None, variables=None, stations=None, bbox=None):
+    """
+    filter_expression - pyarrow predicate of the query, pushed down to the
+    row groups whose statistics may match
+    """
+    names = schema.names
+    conditions = []
+    if "timestamp" in names:
+        type = schema.field("timestamp").type
+        if start is not None:
+            conditions.append(pc.field("timestamp") >= _timestamp(start, type))
+        if end is not None:
+            conditions.append(pc.field("timestamp") < _timestamp(end, type))
+    if variables is not None and "variable" in names:
+        conditions.append(pc.field("variable").isin(list(variables)))
+    if stations is not None and "station_id" in names:
+        type = schema.field("station_id").type
+        values = [str(s) for s in stations] if pa.types.is_string(type) else list(stations)
+        conditions.append(pc.field("station_id").isin(pa.array(values).cast(type)))
+    if bbox is not None:
+        xmin, ymin, xmax, ymax = bbox
+        coords = [(x, y) for x, y in COORD_COLUMNS if x in names and y in names]
+        if coords:
+            x, y = coords[0]
+            conditions += [pc.field(x) >= xmin, pc.field(x) <= xmax, pc.field(y) >= ymin, pc.field(y) <= ymax]
+        elif "bbox" in names:
+            conditions += [pc.field(("bbox", "xmax")) >= xmin, pc.field(("bbox", "xmin")) <= xmax,
+                           pc.field(("bbox", "ymax")) >= ymin, pc.field(("bbox", "ymin")) <= ymax]
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_stored(files, start=None, end=None, variables=None, stations=None, bbox=None):
+    """
+    read_stored - the rows of files matching the query
+    s3 files are read in place, only the row groups that may match.
+    """
+    if not files:
+        return pd.DataFrame(columns=KEYS + ["value"])
+    filesystem = None
+    if iss3(files[0]):
+        filesystem, _ = pafs.FileSystem.from_uri(files[0])
+        files = [f[len("s3://"):] for f in files]
+    dataset = ds.dataset(files, format="parquet", filesystem=filesystem)
+    columns = [c for c in dataset.schema.names if c not in SKIP_COLUMNS]
+    expression = filter_expression(dataset.schema, start, end, variables, stations, bbox)
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def find_gaps(stored, stations, start, end, window=UNIT_WINDOW, tolerance=3600, now=None):
+    """
+    find_gaps - the work units of the request not covered by stored
+    A unit is covered if the stored rows of the station span its part of
+    the request, from max(unit start, start) to min(unit end, end, now),
+    within tolerance seconds at both ends: a window ingested only in part
+    (a crashed run, a late start) is fetched again, as is the unit still
+    being ingested when its last row is older than now minus tolerance.
+    """
+    units = work_units(stations, start, end, window)
+    if len(stored) == 0:
+        return units
+    now = int(time.time() if now is None else pd.Timestamp(now).timestamp())
+    index = {str(s): i for i, s in enumerate(units.stations)}
+    codes = stored["station_id"].astype(str).map(index).to_numpy(dtype="float64")
+    seconds = pd.to_datetime(stored["timestamp"], utc=True).to_numpy(dtype="datetime64[s]").astype("int64")
+    requested = ~np.isnan(codes)
+    codes, seconds = codes[requested].astype("int64"), seconds[requested]
+    if len(codes) == 0:
+        return units
+    # first and last stored row of each (station, window) pair, packed in one int64
+    pairs, inverse = np.unique(codes << 32 | seconds // window, return_inverse=True)
+    first = np.full(len(pairs), np.iinfo("int64").max)
+    last = np.full(len(pairs), np.iinfo("int64").min)
+    np.minimum.at(first, inverse, seconds)
+    np.maximum.at(last, inverse, seconds)
+
+    records = units.records
+    wanted = records["station"].astype("int64") << 32 | records["start"] // window
+    pos = np.minimum(np.searchsorted(pairs, wanted), len(pairs) - 1)
+    found = pairs[pos] == wanted
+    since = np.maximum(records["start"], int(pd.Timestamp(start).timestamp()))
+    until = np.minimum(np.minimum(records["end"], int(pd.Timestamp(end).timestamp())), now)
+    covered = found & (first[pos] <= since + tolerance) & (last[pos] >= until - tolerance)
+    return units[~covered]
+
+
+def query(root, start, end, bbox=None, variables=None, stations=None, fetch=None,
+          window=UNIT_WINDOW, tolerance=3600, namespace=None, client=None):
+    """
+    query - observations of (bbox, [start, end), variables) from the stored
+    partitions of root, the missing windows fetched from the API
+    Files are pruned with the manifest (one GET), row groups with their
+    statistics. Rows fetched for the gaps take precedence over the stored ones.
+    :param stations: stations to cover, default those found in storage
+    :param fetch: function (station, w0, w1) -> DataFrame in long format,
+        None to serve from storage only
+    :param namespace: what fetch returns, e.g. its endpoint and variables,
+        to share its results with the other processes (see fetch_units)
+    :return: DataFrame sorted by station_id, variable, timestamp
+    """
+    t = time.perf_counter()
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    start = start.tz_localize("UTC") if start.tzinfo is None else start
+    end = end.tz_localize("UTC") if end.tzinfo is None else end
+
+    files = plan(root, start=start, end=end, stations=stations, bbox=bbox, client=client)
+    stored = read_stored(files, start, end, variables, stations, bbox)
+    QUERY_ROWS.inc(len(stored), source="storage")
+
+    fetched = []
+    if fetch is not None:
+        wanted = stations if stations is not None else stored["station_id"].unique().tolist()
+        gaps = find_gaps(stored, wanted, start.to_pydatetime(), end.to_pydatetime(), window, tolerance)
+        if gaps:
+            results = fetch_units(wanted, start, end, fetch, window, units=gaps, namespace=namespace)
+            fetched = [df for df in results.values() if df is not None and len(df)]
+        Logger.debug("query: %d gaps of %d stations fetched from the API", len(gaps), len(wanted))
+
+    if fetched:
+        api = pd.concat(fetched, ignore_index=True)
+        api["timestamp"] = pd.to_datetime(api["timestamp"], utc=True)
+        api = api[(api["timestamp"] >= start) & (api["timestamp"] < end)]
+        if variables is not None:
+            api = api[api["variable"].isin(list(variables))]
+        QUERY_ROWS.inc(len(api), source="api")
+        res = deduplicate(pd.concat([api, stored], ignore_index=True))
+    else:
+        res = stored
+    res = res.sort_values([k for k in KEYS if k in res.columns], ignore_index=True)
+    Logger.info("query: %d rows from %d files in %.3fs", len(res), len(files), time.perf_counter() - t)
+    return res
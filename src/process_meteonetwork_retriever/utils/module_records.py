@@ -0,0 +1,190 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_records.py
+# Purpose:     Compact station and work unit records
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import datetime
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+# variables a station can provide, stored as a bitmask
+VARIABLES = ("temperature", "rh", "dew_point", "smlp", "wind_speed", "wind_direction",
+             "wind_gust", "rain_rate", "precipitation", "solar_radiation", "uv")
+
+STATION_DTYPE = np.dtype([
+    ("station_id", "U16"),
+    ("lon", "f8"),
+    ("lat", "f8"),
+    ("elevation", "f4"),
+    ("variables", "u4"),
+])
+
+UNIT_DTYPE = np.dtype([
+    ("station", "i4"),  # index in WorkUnitTable.stations
+    ("start", "i8"),    # epoch seconds
+    ("end", "i8"),
+])
+
+
+def variables_mask(variables):
+    """
+    variables_mask - bitmask of a list of variable names
+    """
+    mask = 0
+    for name in variables or ():
+        if name in VARIABLES:
+            mask |= 1 << VARIABLES.index(name)
+    return mask
+
+
+@dataclass(slots=True, frozen=True)
+class Station:
+    """
+    Station - metadata of one station
+    """
+    station_id: str
+    lon: float
+    lat: float
+    elevation: float = float("nan")
+    variables: tuple = ()
+
+
+@dataclass(slots=True, frozen=True)
+class WorkUnit:
+    """
+    WorkUnit - (station, window start, window end) of a request
+    It unpacks like the (station, w0, w1) tuple it replaces.
+    """
+    station: str
+    start: datetime.datetime
+    end: datetime.datetime
+
+    def __iter__(self):
+        return iter((self.station, self.start, self.end))
+
+
+class StationTable:
+    """
+    StationTable - stations in one structured array, 88 bytes each
+    """
+
+    def __init__(self, records=None):
+        self.records = records if records is not None else np.empty(0, dtype=STATION_DTYPE)
+
+    @classmethod
+    def from_dicts(cls, stations, lon="lon", lat="lat", elevation="elevation"):
+        """
+        from_dicts - table of the station dicts returned by the API
+        """
+        records = np.empty(len(stations), dtype=STATION_DTYPE)
+        for i, station in enumerate(stations):
+            records[i] = (station.get("station_code", station.get("station_id")),
+                          station.get(lon, np.nan), station.get(lat, np.nan),
+                          station.get(elevation) if station.get(elevation) is not None else np.nan,
+                          variables_mask(station.get("variables")))
+        return cls(records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            r = self.records[index]
+            return Station(str(r["station_id"]), float(r["lon"]), float(r["lat"]), float(r["elevation"]),
+                           tuple(v for i, v in enumerate(VARIABLES) if int(r["variables"]) >> i & 1))
+        return StationTable(self.records[index])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def ids(self):
+        return self.records["station_id"]
+
+    def in_bbox(self, bbox):
+        """
+        in_bbox - mask of the stations in (minx, miny, maxx, maxy)
+        """
+        xmin, ymin, xmax, ymax = bbox
+        lon, lat = self.records["lon"], self.records["lat"]
+        return (lon >= xmin) & (lon <= xmax) & (lat >= ymin) & (lat <= ymax)
+
+    def has_variable(self, name):
+        """
+        has_variable - mask of the stations providing the variable
+        """
+        return (self.records["variables"] & variables_mask([name])) != 0
+
+    def to_frame(self):
+        return pd.DataFrame(self.records)
+
+
+class WorkUnitTable:
+    """
+    WorkUnitTable - work units in one structured array, 20 bytes each
+    WorkUnit objects are created only while iterating.
+    """
+
+    def __init__(self, stations, records, tz=datetime.timezone.utc):
+        self.stations = np.asarray(stations, dtype=object)
+        self.records = records
+        self.tz = tz
+
+    @classmethod
+    def build(cls, stations, start, end, window):
+        """
+        build - all (station, window) units of the request, windows aligned
+        to multiples of window seconds from the epoch
+        Naive start and end are UTC, as in the queries.
+        """
+        start, end = (t if t.tzinfo else t.replace(tzinfo=datetime.timezone.utc) for t in (start, end))
+        t0 = int(start.timestamp()) // window * window
+        t1 = int(end.timestamp())
+        starts = np.arange(t0, max(t1, t0 + 1), window, dtype="i8")
+        stations = list(stations)
+        records = np.empty(len(stations) * len(starts), dtype=UNIT_DTYPE)
+        records["station"] = np.repeat(np.arange(len(stations), dtype="i4"), len(starts))
+        records["start"] = np.tile(starts, len(stations))
+        records["end"] = records["start"] + window
+        return cls(stations, records, start.tzinfo)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            r = self.records[index]
+            return WorkUnit(self.stations[r["station"]],
+                            datetime.datetime.fromtimestamp(int(r["start"]), self.tz),
+                            datetime.datetime.fromtimestamp(int(r["end"]), self.tz))
+        return WorkUnitTable(self.stations, self.records[index], self.tz)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def station_ids(self):
+        """
+        station_ids - station of each unit, vectorised
+        """
+        return self.stations[self.records["station"]]
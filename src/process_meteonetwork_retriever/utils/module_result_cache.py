@@ -0,0 +1,157 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_result_cache.py
+# Purpose:     Cache of process results keyed by the normalised inputs
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import os
+import json
+import math
+import time
+import datetime
+import tempfile
+from .filesystem import md5text
+from .module_s3 import tmp, copy, iss3, isfile, delete
+from ..cli.module_log import Logger
+
+# pygeoapi async job mode is deferred: it is declared by the
+# jobControlOptions of MeteoNetworkRetrieverProcessor, which this cache
+# does not depend on.
+
+# start times are rounded up and end times down to the data resolution:
+# [09:50, 10:10] and [10:00, 10:00] select the same observations, while
+# [09:45, ...] does not and gets its own key
+START_KEYS = ("time_start", "start")
+END_KEYS = ("time_end", "end", "date")
+SET_KEYS = ("variables", "stations")
+IGNORE_KEYS = ("debug", "verbose", "backend", "jid", "token")
+
+RESULT_TTL = 15 * 60
+
+
+def snap_time(value, resolution, up=False):
+    """
+    snap_time - floor (or ceil if up) an ISO datetime string to the data
+    resolution (seconds)
+    """
+    try:
+        t = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return value
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=datetime.timezone.utc)
+    seconds = math.ceil(t.timestamp() / resolution) if up else math.floor(t.timestamp() / resolution)
+    return datetime.datetime.fromtimestamp(seconds * resolution, datetime.timezone.utc).isoformat()
+
+
+def canonical_inputs(inputs, resolution=900, precision=4):
+    """
+    canonical_inputs - normalise the process inputs so that equivalent
+    requests are equal: times snapped to the resolution, coordinates rounded,
+    unordered lists sorted and the options without effect on the result dropped
+    """
+    res = {}
+    for key, value in inputs.items():
+        if key in IGNORE_KEYS or value is None:
+            continue
+        if key in START_KEYS:
+            value = snap_time(value, resolution, up=True)
+        elif key in END_KEYS:
+            value = snap_time(value, resolution)
+        elif key == "bbox" and isinstance(value, (list, tuple)):
+            value = [round(float(v), precision) for v in value]
+        elif key in SET_KEYS:
+            value = sorted({str(v).strip().lower() for v in (value.split(",") if isinstance(value, str) else value)})
+        res[key] = value
+    return res
+
+
+def cache_key(inputs, resolution=900):
+    """
+    cache_key - canonical hash of the inputs
+    """
+    return md5text(json.dumps(canonical_inputs(inputs, resolution), sort_keys=True, default=str))
+
+
+class ResultCache:
+    """
+    ResultCache - process outputs stored as json on local disk or on s3
+    """
+
+    def __init__(self, root=None, ttl=RESULT_TTL, client=None):
+        self.root = (root or f"{tempfile.gettempdir()}/{__package__}/results").rstrip("/")
+        self.ttl = ttl
+        self.client = client
+        if not iss3(self.root):
+            os.makedirs(self.root, exist_ok=True)
+
+    def uri(self, key):
+        return f"{self.root}/{key}.json"
+
+    def get(self, key):
+        """
+        get - the cached outputs for key, or None if missing or expired
+        """
+        uri = self.uri(key)
+        if not isfile(uri):
+            return None
+        filename = copy(uri, client=self.client) if iss3(uri) else uri
+        try:
+            with open(filename, "r", encoding="utf-8") as stream:
+                entry = json.load(stream)
+        except (OSError, ValueError) as ex:
+            Logger.warning("Invalid cache entry %s:%s", uri, ex)
+            return None
+        if time.time() > entry["created"] + entry["ttl"]:
+            delete(uri, client=self.client)
+            return None
+        return entry["outputs"]
+
+    def put(self, key, outputs, ttl=None):
+        """
+        put - store the outputs for key
+        """
+        entry = {"created": time.time(), "ttl": ttl or self.ttl, "outputs": outputs}
+        uri = self.uri(key)
+        filename = tmp(uri) if iss3(uri) else f"{uri}.{os.getpid()}.tmp"
+        with open(filename, "w", encoding="utf-8") as stream:
+            json.dump(entry, stream, default=str)
+        if iss3(uri):
+            copy(filename, uri, client=self.client)
+        else:
+            os.replace(filename, uri)
+        return outputs
+
+
+def cached_execute(func, inputs, cache=None, resolution=900):
+    """
+    cached_execute - run func(**inputs) unless an equivalent request is cached
+    :return: (outputs, hit)
+    """
+    cache = cache or ResultCache()
+    key = cache_key(inputs, resolution)
+    outputs = cache.get(key)
+    if outputs is not None:
+        Logger.debug("result cache hit %s", key)
+        return outputs, True
+    outputs = func(**inputs)
+    cache.put(key, outputs)
+    return outputs, False
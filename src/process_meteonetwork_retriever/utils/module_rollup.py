@@ -0,0 +1,205 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_rollup.py
+# Purpose:     Temporal aggregation (rollup) of station observations
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import os
+import time
+import random
+import contextlib
+import numpy as np
+import pandas as pd
+from .module_s3 import tmp, copy, isfile, upload, hive_path
+from .module_manifest import file_stats, update_manifest
+from .module_lease import Lease, get_backend, keep_alive
+from ..cli.module_log import Logger
+
+# Observations are in long format: one row per (station_id, variable, timestamp)
+KEYS = ["station_id", "variable", "timestamp"]
+
+# Rollups keep the partial aggregates so that new data can be merged in
+# without re-reading the raw history
+PARTIALS = ["count", "sum", "min", "max"]
+
+ROLLUP_RULES = {
+    "precipitation": "sum",
+    "rain": "sum",
+    "temperature": "mean",
+    "dew_point": "mean",
+    "rh": "mean",
+    "smlp": "mean",
+    "wind_speed": "mean",
+    "wind_gust": "max",
+}
+
+ROLLUP_FREQS = ("1h", "1D")
+
+# a month partition is rewritten by one writer at a time
+LOCK_TTL = 120
+LOCK_TIMEOUT = 600
+
+
+def rollup(df, freq="1h", rules=None):
+    """
+    rollup - aggregate raw observations over time bins of size freq
+    :param df: DataFrame with columns station_id, variable, timestamp, value
+    :param freq: pandas frequency of the bins (e.g. "1h", "1D")
+    :param rules: dict variable -> sum|mean|min|max, default ROLLUP_RULES
+    :return: DataFrame with KEYS, PARTIALS and value, one row per bin
+    """
+    df = df.dropna(subset=["value"])
+    bins = pd.to_datetime(df["timestamp"], utc=True).dt.floor(freq)
+    grouped = df.groupby([df["station_id"], df["variable"], bins.rename("timestamp")],
+                         sort=False, observed=True)["value"]
+    res = grouped.agg(PARTIALS).reset_index()
+    return finalize(res, rules)
+
+
+def merge_rollup(old, new, rules=None):
+    """
+    merge_rollup - merge two rollups of the same frequency
+    Bins present in both are combined from their partial aggregates, so the
+    result is the same as re-aggregating the union of the raw observations.
+    Input raw observations must be deduplicated before rollup.
+    """
+    if old is None or len(old) == 0:
+        return finalize(new[KEYS + PARTIALS], rules)
+    df = pd.concat([old[KEYS + PARTIALS], new[KEYS + PARTIALS]], ignore_index=True)
+    res = df.groupby(KEYS, sort=False, observed=True).agg(
+        count=("count", "sum"),
+        sum=("sum", "sum"),
+        min=("min", "min"),
+        max=("max", "max"),
+    ).reset_index()
+    return finalize(res, rules)
+
+
+def finalize(df, rules=None):
+    """
+    finalize - compute the value column from the partial aggregates
+    """
+    rules = rules or ROLLUP_RULES
+    rule = df["variable"].map(rules).fillna("mean").to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = df["sum"].to_numpy(dtype="float64") / df["count"].to_numpy(dtype="float64")
+    df = df.copy()
+    df["value"] = np.select(
+        [rule == "sum", rule == "min", rule == "max"],
+        [df["sum"], df["min"], df["max"]],
+        default=mean,
+    )
+    return df.sort_values(KEYS, ignore_index=True)
+
+
+def rollup_partitions(df):
+    """
+    rollup_partitions - split observations or a rollup by year/month partition
+    """
+    ts = pd.to_datetime(df["timestamp"], utc=True)
+    for (year, month), part in df.groupby([ts.dt.year, ts.dt.month], sort=True):
+        yield {"year": int(year), "month": int(month)}, part
+
+
+def rollup_root(raw_uri):
+    """
+    rollup_root - rollups are stored next to the raw output
+    """
+    return f"{raw_uri.rsplit('/', 1)[0]}/rollup"
+
+
+@contextlib.contextmanager
+def partition_lock(root, partition, client=None, timeout=LOCK_TIMEOUT):
+    """
+    partition_lock - exclusive access to a month partition of the rollups,
+    a lease under {root}/_locks so that it works on s3 as on local roots,
+    renewed in background while the partition is rewritten
+    """
+    lease = Lease(get_backend(f"{root}/_locks", client), hive_path(partition), ttl=LOCK_TTL)
+    t = time.monotonic()
+    while not lease.acquire():
+        if time.monotonic() - t > timeout:
+            raise TimeoutError(f"Could not lock the rollup partition {hive_path(partition)} of {root}")
+        time.sleep(0.05 + 0.2 * random.random())
+    try:
+        with keep_alive(lease):
+            yield lease
+    finally:
+        lease.release()
+
+
+def _read_keys(uri, client=None):
+    if not isfile(uri, client=client):
+        return np.empty(0, dtype="int64")
+    return pd.read_parquet(copy(uri, client=client))["key"].to_numpy(dtype="int64")
+
+
+def update_rollups(df, raw_uri, freqs=ROLLUP_FREQS, rules=None, client=None):
+    """
+    update_rollups - merge new raw observations into the persisted rollups
+    Only the partitions touched by the new data are read and rewritten, and
+    the manifest of the rollup root is updated once for all of them.
+    The packed keys of the observations merged so far are kept in
+    {root}/_keys: rows replayed by overlapping fetch windows are merged once.
+    :param df: new raw observations (long format)
+    :param raw_uri: local or s3 uri of the raw output
+    :return: list of the written rollup uris
+    """
+    from .module_dedup import pack_keys
+    written = []
+    if df is None or len(df) == 0:
+        return written
+
+    root = rollup_root(raw_uri)
+    entries = {}
+    try:
+        for partition, raw in rollup_partitions(df):
+            with partition_lock(root, partition, client):
+                keys_uri = f"{root}/_keys/{hive_path(partition)}/keys.parquet"
+                seen = _read_keys(keys_uri, client)
+                keys = pd.Series(pack_keys(raw))
+                mask = ~keys.duplicated(keep="first").to_numpy() & ~keys.isin(seen).to_numpy()
+                if not mask.any():
+                    continue
+                raw = raw[mask]
+                for freq in freqs:
+                    uri = f"{root}/{hive_path({'freq': freq} | partition)}/rollup.parquet"
+                    old = None
+                    if isfile(uri, client=client):
+                        old = pd.read_parquet(copy(uri, client=client))
+                    merged = merge_rollup(old, rollup(raw, freq, rules), rules)
+                    fileout = tmp(uri)
+                    merged.to_parquet(fileout, index=False)
+                    stats = file_stats(merged, os.path.getsize(fileout))
+                    upload(fileout, uri, client=client)
+                    Logger.debug("rollup %s: %d rows", uri, len(merged))
+                    entries[uri] = stats
+                    written.append(uri)
+                # the keys are written last and only if the rollups were: a crash
+                # in between can count these rows twice on replay, never drop them
+                fileout = tmp(keys_uri)
+                pd.DataFrame({"key": np.concatenate([seen, keys.to_numpy()[mask]])}).to_parquet(fileout, index=False)
+                upload(fileout, keys_uri, client=client)
+    finally:
+        # the partitions rewritten before a failure are committed too
+        if entries:
+            update_manifest(root, add=entries, client=client)
+    return written
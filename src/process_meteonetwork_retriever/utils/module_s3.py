@@ -27,6 +27,7 @@ import random
 import shutil
 import tempfile
 import fnmatch
+import threading
 import boto3
 import requests
 import logging
@@ -36,10 +37,13 @@ from botocore.exceptions import ClientError, NoCredentialsError
 from .filesystem import justext, justpath, justfname, forceext
 from .strings import startswith
 from ..cli.module_log import Logger
+from .module_metrics import REGISTRY, instrument
 
 logging.getLogger("botocore").setLevel(logging.CRITICAL)
 logging.getLogger("boto3").setLevel(logging.CRITICAL)
 
+S3_BYTES = REGISTRY.counter("meteonetwork_s3_bytes", "Bytes transferred to and from s3")
+
 shpext = ("shp", "dbf", "shx", "prj", "qml", "qix", "qlr", "mta", "qmd", "cpg")
 
 def tmp(filename):
@@ -90,6 +94,7 @@ def http_exists(url):
     return False
 
 
+@instrument("http_get")
 def http_get(url, headers=None, mode="text"):
     """
     http_get use requests
@@ -126,7 +131,7 @@ def isuri(filename):
         startswith(filename, ("http://", "https://"))
 
 
-def isfile(filename):
+def isfile(filename, client=None):
     """
     isfile
     """
@@ -137,7 +142,7 @@ def isfile(filename):
     elif isuri(filename):
         return http_exists(filename)
     elif iss3(filename):
-        return s3_exists(filename)
+        return s3_exists(filename, client=client)
     return False
 
 
@@ -166,14 +171,26 @@ def get_bucket_name_key(uri):
     return bucket_name, key_name
 
 
+_clients = {}
+_clients_lock = threading.Lock()
+
+
 def get_client(client=None):
     """
-    get_client
+    get_client - the given client or the one of this process, created once
     """
-    return client if client else boto3.client('s3')
+    if client:
+        return client
+    pid = os.getpid()
+    if pid not in _clients:
+        with _clients_lock:
+            if pid not in _clients:
+                _clients[pid] = boto3.client('s3')
+    return _clients[pid]
 
 
 
+@instrument("s3_upload")
 def s3_upload(filename, uri, remove_src=False, client=None):
     """
     Upload a file to an S3 bucket
@@ -190,6 +207,7 @@ def s3_upload(filename, uri, remove_src=False, client=None):
             client.upload_file(Filename=filename,
                                 Bucket=bucket_name, Key=key,
                                 ExtraArgs=extra_args)
+            S3_BYTES.inc(os.path.getsize(filename), direction="upload")
      
             if remove_src:
                 Logger.debug("removing %s", filename)
@@ -204,6 +222,7 @@ def s3_upload(filename, uri, remove_src=False, client=None):
     return False
 
 
+@instrument("s3_download")
 def s3_download(uri, fileout=None, remove_src=False, client=None):
     """
     Download a file from an S3 bucket
@@ -225,6 +244,7 @@ def s3_download(uri, fileout=None, remove_src=False, client=None):
                 os.makedirs(justpath(fileout), exist_ok=True)
                 client.download_file(
                     Filename=fileout, Bucket=bucket_name, Key=key)
+                S3_BYTES.inc(os.path.getsize(fileout), direction="download")
                 if remove_src:
                     client.delete_object(Bucket=bucket_name, Key=key)
             else:
@@ -248,6 +268,7 @@ def s3_download(uri, fileout=None, remove_src=False, client=None):
     return fileout if os.path.isfile(fileout) else None
 
 
+@instrument("s3_exists", check=lambda res: True)
 def s3_exists(uri, client=None):
     """
     s3_exists
@@ -260,11 +281,16 @@ def s3_exists(uri, client=None):
             client.head_object(Bucket=bucket_name, Key=filepath)
             res = True
     except ClientError as ex:
-        Logger.error(ex)
+        # a missing object is an expected answer, not an error
+        if ex.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            Logger.debug("%s does not exist", uri)
+        else:
+            Logger.error(ex)
         
     return res
 
 
+@instrument("s3_remove")
 def s3_remove(uri, filter=None, client=None):
     """
     s3_remove
@@ -291,6 +317,7 @@ def s3_remove(uri, filter=None, client=None):
     return res
 
 
+@instrument("s3_copy")
 def s3_copy(src, dst, client=None):
     """
     s3_copy
@@ -311,6 +338,7 @@ def s3_copy(src, dst, client=None):
     return res
 
 
+@instrument("s3_move")
 def s3_move(src, dst, client=None):
     """
     s3_move
@@ -330,6 +358,75 @@ def s3_move(src, dst, client=None):
     return res
 
 
+@instrument("s3_presign")
+def s3_presign(uri, expires=3600, client=None):
+    """
+    s3_presign - presigned https url to GET the object, valid for expires seconds
+    """
+    res = None
+    try:
+        bucket_name, key = get_bucket_name_key(uri)
+        if bucket_name and key:
+            client = get_client(client)
+            res = client.generate_presigned_url("get_object",
+                                                Params={"Bucket": bucket_name, "Key": key},
+                                                ExpiresIn=expires)
+    except (ClientError, NoCredentialsError) as ex:
+        Logger.error(ex)
+    return res
+
+
+@instrument("s3_get", check=lambda res: True)
+def s3_get(uri, client=None):
+    """
+    s3_get - the body and the ETag of a small object, (None, None) if missing
+    """
+    try:
+        bucket_name, key = get_bucket_name_key(uri)
+        client = get_client(client)
+        response = client.get_object(Bucket=bucket_name, Key=key)
+        body = response["Body"].read()
+        S3_BYTES.inc(len(body), direction="download")
+        return body, response["ETag"]
+    except ClientError as ex:
+        if ex.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            Logger.debug("%s does not exist", uri)
+        else:
+            Logger.error(ex)
+    except NoCredentialsError as ex:
+        Logger.error(ex)
+    return None, None
+
+
+@instrument("s3_put", check=lambda res: True)
+def s3_put(uri, body, if_match=None, if_none_match=False, client=None):
+    """
+    s3_put - write a small object, optionally only if its ETag is still
+    if_match, or only if it does not exist yet (if_none_match)
+    :return: the new ETag, None if the condition failed or on error
+    """
+    try:
+        bucket_name, key = get_bucket_name_key(uri)
+        client = get_client(client)
+        kwargs = {}
+        if if_match:
+            kwargs["IfMatch"] = if_match
+        elif if_none_match:
+            kwargs["IfNoneMatch"] = "*"
+        response = client.put_object(Bucket=bucket_name, Key=key, Body=body, **kwargs)
+        S3_BYTES.inc(len(body), direction="upload")
+        return response["ETag"]
+    except ClientError as ex:
+        if ex.response.get("Error", {}).get("Code") in ("PreconditionFailed", "ConditionalRequestConflict"):
+            Logger.debug("%s was changed concurrently", uri)
+        else:
+            Logger.error(ex)
+    except NoCredentialsError as ex:
+        Logger.error(ex)
+    return None
+
+
+@instrument("s3_list", check=lambda res: True)
 def s3_list(s3_uri, filename_prefix="", client=None, retrieve_properties=[]):
     """
     Elenca tutti i file in un bucket S3 dato il suo URI, filtrando per un prefisso specifico.
@@ -467,6 +564,21 @@ def move(src, dst, client=None):
     return dst
 
 
+def upload(filename, uri, client=None):
+    """
+    upload - move the local file filename to uri, local or s3
+    Unlike move, a failure raises: the caller must not go on as if uri
+    was written, e.g. commit it to a manifest or drop its sources.
+    """
+    if iss3(uri):
+        if not s3_upload(filename, uri, remove_src=True, client=client):
+            raise RuntimeError(f"Could not upload {uri}")
+    else:
+        os.makedirs(justpath(uri), exist_ok=True)
+        shutil.move(filename, uri)
+    return uri
+
+
 def delete(uri, client=None):
     """
     delete
@@ -0,0 +1,146 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_shm.py
+# Purpose:     Process pool over shared-memory arrays for post-processing
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import os
+import sys
+import numpy as np
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from ..cli.module_log import Logger
+
+# Below this size the arrays are processed in the calling process
+MIN_PARALLEL_BYTES = 16 * 1024 * 1024
+
+
+def share(array):
+    """
+    share - copy array into a new shared memory block
+    :return: (SharedMemory, descriptor) the descriptor is what workers receive
+    """
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def empty(shape, dtype):
+    """
+    empty - a new uninitialised shared array
+    :return: (SharedMemory, descriptor)
+    """
+    dtype = np.dtype(dtype)
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+    return shm, (shm.name, tuple(shape), dtype.str)
+
+
+def attach(descriptor):
+    """
+    attach - the array of a descriptor, without copying
+    :return: (SharedMemory, ndarray) keep the SharedMemory alive while using the array
+    """
+    name, shape, dtype = descriptor
+    # the pool workers share the resource tracker of the creator, which
+    # is the only one to unlink the block
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def blocks(n, n_blocks):
+    """
+    blocks - split range(n) into n_blocks contiguous (start, stop)
+    """
+    bounds = np.linspace(0, n, min(n_blocks, n) + 1, dtype=int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def _run_block(func, inputs, output, start, stop, axis):
+    """
+    _run_block - worker side: attach, run func on the block, write the result in place
+    """
+    handles = []
+    try:
+        kwargs = {}
+        for key, descriptor in inputs.items():
+            shm, array = attach(descriptor)
+            handles.append(shm)
+            kwargs[key] = array[(slice(None),) * axis + (slice(start, stop),)]
+        shm, out = attach(output)
+        handles.append(shm)
+        out[(slice(None),) * axis + (slice(start, stop),)] = func(**kwargs)
+        del kwargs, out
+    finally:
+        for shm in handles:
+            shm.close()
+    return stop - start
+
+
+def _in_process(func, inputs, out_shape, out_dtype):
+    return np.asarray(func(**inputs), dtype=out_dtype).reshape(out_shape)
+
+
+def parallel_blocks(func, inputs, out_shape, out_dtype="float64", axis=0, n_blocks=None, max_workers=None):
+    """
+    parallel_blocks - run func over blocks of the input arrays in a process pool
+    The arrays travel through shared memory, only their names are pickled.
+    func(**blocks) receives the slices [start:stop] along axis (timesteps or
+    station blocks) and returns the matching slice of the output. It must be
+    a module level function.
+    :param inputs: dict name -> ndarray, all with the same length along axis
+    :return: the output ndarray
+    """
+    max_workers = max_workers or os.cpu_count()
+    n = out_shape[axis]
+    nbytes = sum(array.nbytes for array in inputs.values())
+    if max_workers <= 1 or nbytes < MIN_PARALLEL_BYTES:
+        return _in_process(func, inputs, out_shape, out_dtype)
+
+    handles = []
+    try:
+        # AWS Lambda has no /dev/shm: no shared memory and no process pool
+        try:
+            descriptors = {}
+            for key, array in inputs.items():
+                shm, descriptors[key] = share(array)
+                handles.append(shm)
+            out_shm, output = empty(out_shape, out_dtype)
+            handles.append(out_shm)
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        except OSError as ex:
+            Logger.warning("parallel_blocks: shared memory not available, running in process: %s", ex)
+            return _in_process(func, inputs, out_shape, out_dtype)
+
+        with executor:
+            futures = [executor.submit(_run_block, func, descriptors, output, start, stop, axis)
+                       for start, stop in blocks(n, n_blocks or max_workers * 4)]
+            done = sum(future.result() for future in futures)
+        Logger.debug("parallel_blocks: %d items on %d workers", done, max_workers)
+
+        return np.ndarray(out_shape, dtype=np.dtype(out_dtype), buffer=out_shm.buf).copy()
+    finally:
+        for shm in handles:
+            shm.close()
+            shm.unlink()
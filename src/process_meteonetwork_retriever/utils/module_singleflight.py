@@ -0,0 +1,192 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_singleflight.py
+# Purpose:     Coalescing of concurrent identical upstream requests
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import os
+import time
+import pickle
+import getpass
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from filelock import FileLock, Timeout
+from .filesystem import md5text, private_dir
+from .module_records import WorkUnitTable
+from ..cli.module_log import Logger
+
+UNIT_WINDOW = 24 * 3600
+
+
+def work_units(stations, start, end, window=UNIT_WINDOW):
+    """
+    work_units - split a request into (station, window_start, window_end) units
+    Windows are aligned to multiples of window seconds from the epoch, so
+    overlapping requests are made of the same units.
+    :return: WorkUnitTable, iterating it gives WorkUnit records
+    """
+    return WorkUnitTable.build(stations, start, end, window)
+
+
+def unit_key(unit, namespace=None):
+    """
+    unit_key - string key of a work unit, prefixed with namespace
+    """
+    station, w0, w1 = unit
+    key = f"{station}/{w0.isoformat()}/{w1.isoformat()}"
+    return f"{namespace}|{key}" if namespace else key
+
+
+def fetch_name(fetch):
+    """
+    fetch_name - stable name of a fetch function, the same in every process
+    """
+    func = getattr(fetch, "func", fetch)  # functools.partial
+    return f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', type(func).__qualname__)}"
+
+
+class SingleFlight:
+    """
+    SingleFlight - run a function once per key among concurrent callers
+    Within the process the callers of an in-flight key wait on the same
+    Future. With lockdir, the processes of the host are coalesced too: the
+    first one takes a FileLock and leaves the result on disk for ttl seconds.
+    Results are unpickled, so lockdir must be private to the user: it is
+    created with mode 0700 and PermissionError is raised if it is not.
+    """
+
+    def __init__(self, lockdir=None, ttl=60):
+        self.lockdir = lockdir
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.purged = 0.0
+        if lockdir:
+            private_dir(lockdir)
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        do - the result of func(*args, **kwargs), shared by all the callers of key
+        """
+        with self.lock:
+            future = self.inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self.inflight[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            if self.lockdir:
+                res = self._do_shared(key, func, *args, **kwargs)
+            else:
+                res = func(*args, **kwargs)
+            future.set_result(res)
+        except Exception as ex:
+            future.set_exception(ex)
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+        return res
+
+    def _do_shared(self, key, func, *args, **kwargs):
+        """
+        _do_shared - coalesce across the processes of the host
+        """
+        self.purge()
+        name = md5text(key)
+        filename = f"{self.lockdir}/{name}.pkl"
+        with FileLock(f"{self.lockdir}/{name}.lock"):
+            if os.path.isfile(filename) and time.time() - os.path.getmtime(filename) < self.ttl:
+                with open(filename, "rb") as stream:
+                    Logger.debug("single-flight: %s shared from another process", key)
+                    return pickle.load(stream)
+            res = func(*args, **kwargs)
+            with open(f"{filename}.tmp", "wb") as stream:
+                pickle.dump(res, stream)
+            os.replace(f"{filename}.tmp", filename)
+            return res
+
+    def purge(self):
+        """
+        purge - remove the expired results and the unused locks, at most
+        once per ttl. A lock is removed only while holding it, at worst a
+        process waiting on the removed file fetches its unit once more.
+        """
+        now = time.time()
+        if now - self.purged < self.ttl:
+            return
+        self.purged = now
+        for entry in os.scandir(self.lockdir):
+            try:
+                if now - entry.stat().st_mtime < self.ttl:
+                    continue
+                if entry.name.endswith((".pkl", ".tmp")):
+                    os.unlink(entry.path)
+                elif entry.name.endswith(".lock"):
+                    with FileLock(entry.path, timeout=0):
+                        os.unlink(entry.path)
+            except FileNotFoundError:
+                pass  # removed by another process
+            except Timeout:
+                pass  # in use
+
+
+_flight = None
+_local_flight = SingleFlight()
+
+
+def get_flight(shared=True):
+    """
+    get_flight - the single-flight group of this process, shared on the host
+    :param shared: False for the group coalescing only within the process
+    """
+    global _flight
+    if not shared:
+        return _local_flight
+    if _flight is None:
+        try:
+            _flight = SingleFlight(lockdir=f"{tempfile.gettempdir()}/{__package__}-singleflight-{getpass.getuser()}")
+        except PermissionError as ex:
+            Logger.warning("single-flight not shared between processes: %s", ex)
+            _flight = SingleFlight()
+    return _flight
+
+
+def fetch_units(stations, start, end, fetch, window=UNIT_WINDOW, flight=None, max_workers=8, units=None,
+                namespace=None):
+    """
+    fetch_units - fetch(station, w0, w1) once per work unit of the request
+    Results are shared with the other processes of the host only with a
+    namespace naming what fetch returns, e.g. the endpoint and variables:
+    the key is then namespace, the name of fetch and the unit. Without
+    it concurrent callers are coalesced within the process only.
+    :param units: fetch only these units of the request, e.g. the gaps
+    :return: dict unit -> result
+    """
+    flight = flight or get_flight(shared=namespace is not None)
+    namespace = f"{namespace}|{fetch_name(fetch)}" if namespace is not None else fetch_name(fetch)
+    units = units if units is not None else work_units(stations, start, end, window)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda unit: flight.do(unit_key(unit, namespace), fetch, *unit), units)
+        return dict(zip(units, results))
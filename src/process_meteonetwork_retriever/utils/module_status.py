@@ -26,8 +26,12 @@ import json
 import requests
 import datetime
 from ..cli.module_log import Logger
+from .module_metrics import REGISTRY, instrument
 
+STATUS_UPDATES = REGISTRY.counter("meteonetwork_status_updates", "Job status updates by status")
 
+
+@instrument("status_patch", check=lambda res: res != {})
 def patch(url, data):
     """
     patch - send a PATCH request to the given URL with the provided data.
@@ -71,6 +75,7 @@ def set_status(backend, jid, progress, message=""):
                 "status": "running",
                 "progress": progress
             }
+            STATUS_UPDATES.inc(status=data["status"])
             patch(url, data)
             return
 
@@ -99,4 +104,5 @@ def set_status(backend, jid, progress, message=""):
                 "status": "running",
                 "progress": progress
             }
+        STATUS_UPDATES.inc(status=data["status"])
         patch(url, data)
@@ -0,0 +1,147 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_stream.py
+# Purpose:     Streaming serialisation of result chunks
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import io
+import json
+import pyarrow as pa
+from .module_s3 import iss3, move, tmp, s3_presign
+
+MIME_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "geojsonseq": "application/geo+json-seq",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+RS = b"\x1e"  # RFC 8142 record separator
+
+
+def to_ndjson(batches):
+    """
+    to_ndjson - one json object per line, a chunk of bytes per batch
+    """
+    for df in batches:
+        if len(df):
+            data = df.drop(columns="geometry", errors="ignore")
+            yield data.to_json(orient="records", lines=True, date_format="iso").rstrip("\n").encode("utf-8") + b"\n"
+
+
+def to_geojson_seq(batches, lon="longitude", lat="latitude"):
+    """
+    to_geojson_seq - GeoJSON text sequence (RFC 8142), a chunk of bytes per batch
+    Batches are GeoDataFrames or DataFrames with lon/lat columns.
+    """
+    for df in batches:
+        if "geometry" in df:
+            features = df.iterfeatures(na="null")
+        else:
+            records = json.loads(df.to_json(orient="records", date_format="iso"))
+            features = ({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [record.pop(lon), record.pop(lat)]},
+                "properties": record,
+            } for record in records)
+        yield b"".join(RS + json.dumps(feature, default=str).encode("utf-8") + b"\n" for feature in features)
+
+
+def stream_schema(table):
+    """
+    stream_schema - the schema of a stream inferred from its first table
+    A column can be all null, or all integers, in the first batch only:
+    null columns are sent as strings and integer ones as float64, as pandas
+    does as soon as a value is missing.
+    """
+    fields = []
+    for field in table.schema:
+        if pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        elif pa.types.is_integer(field.type):
+            field = field.with_type(pa.float64())
+        fields.append(field)
+    return pa.schema(fields)
+
+
+def to_arrow_ipc(batches, schema=None):
+    """
+    to_arrow_ipc - Arrow IPC stream, the schema comes with the first batch
+    Every batch is cast to the schema, so a type that changes between
+    batches does not break the stream halfway.
+    :param schema: pyarrow schema, default inferred from the first batch
+    """
+    sink = io.BytesIO()
+    writer = None
+    for df in batches:
+        table = pa.Table.from_pandas(df.drop(columns="geometry", errors="ignore"), preserve_index=False)
+        if writer is None:
+            schema = schema or stream_schema(table)
+            writer = pa.ipc.new_stream(sink, schema)
+        writer.write_table(table.select(schema.names).cast(schema))
+        yield _drain(sink)
+    if writer is not None:
+        writer.close()
+        yield _drain(sink)
+
+
+def _drain(sink):
+    """
+    _drain - the bytes written so far, the buffer is emptied
+    """
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+STREAMS = {
+    "ndjson": to_ndjson,
+    "geojsonseq": to_geojson_seq,
+    "arrow": to_arrow_ipc,
+}
+
+
+def stream(batches, fmt="ndjson"):
+    """
+    stream - serialise the batches as they come
+    :return: (mime type, generator of bytes)
+    """
+    return MIME_TYPES[fmt], STREAMS[fmt](batches)
+
+
+def stream_to_file(batches, fileout, fmt="ndjson", client=None):
+    """
+    stream_to_file - write the batches to fileout (local or s3) chunk by chunk,
+    so memory does not depend on the size of the result
+    """
+    filename = tmp(fileout) if iss3(fileout) else fileout
+    with open(filename, "wb") as out:
+        for chunk in STREAMS[fmt](batches):
+            out.write(chunk)
+    return move(filename, fileout, client=client) if iss3(fileout) else fileout
+
+
+def stream_to_link(batches, fileout, fmt="ndjson", expires=3600, client=None):
+    """
+    stream_to_link - write the product to s3 and return a presigned url
+    """
+    uri = stream_to_file(batches, fileout, fmt, client=client)
+    return s3_presign(uri, expires=expires, client=client)
@@ -0,0 +1,208 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_throttle.py
+# Purpose:     Adaptive concurrency limit and circuit breaker for the API client
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import time
+import datetime
+import threading
+import contextlib
+from email.utils import parsedate_to_datetime
+from requests.exceptions import RequestException
+from ..cli.module_log import Logger
+from .module_metrics import REGISTRY
+
+CONCURRENCY = REGISTRY.gauge("meteonetwork_http_concurrency_limit", "Adaptive limit of in-flight API requests")
+BREAKER = REGISTRY.gauge("meteonetwork_http_circuit_open", "1 while the circuit of the endpoint is open")
+
+
+def parse_retry_after(value, default=1.0):
+    """
+    parse_retry_after - seconds to wait from a Retry-After header (seconds or http-date)
+    """
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return default
+
+
+class AdaptiveLimiter:
+    """
+    AdaptiveLimiter - AIMD limit of the in-flight requests
+    The limit grows by about one request per round trip while the latency
+    stays close to the best seen for the endpoint, and is halved on 429s and timeouts (at
+    most once per cooldown, so that one burst of errors halves it once).
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=64, tolerance=2.0, backoff=0.5, cooldown=1.0):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.inflight = 0
+        self.best_latency = {}
+        self.last_decrease = 0.0
+        self.paused_until = 0.0
+        self.condition = threading.Condition()
+        CONCURRENCY.set(self.limit)
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0 and self.inflight < int(self.limit):
+                    break
+                self.condition.wait(timeout=wait if wait > 0 else None)
+            self.inflight += 1
+
+    def release(self):
+        with self.condition:
+            self.inflight -= 1
+            self.condition.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self):
+        """
+        slot - hold one of the in-flight slots
+        """
+        self.acquire()
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def on_success(self, latency, endpoint=None):
+        """
+        on_success - compare latency with the best one of the same endpoint:
+        a heavy data call is not slow because the stations catalogue is fast
+        """
+        with self.condition:
+            best = min(latency, self.best_latency.get(endpoint, latency))
+            self.best_latency[endpoint] = best
+            if latency <= best * self.tolerance:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            CONCURRENCY.set(self.limit)
+            self.condition.notify_all()
+
+    def on_overload(self, retry_after=None):
+        """
+        on_overload - a 429, 503 or timeout: decrease and honour Retry-After
+        """
+        with self.condition:
+            now = time.monotonic()
+            if now - self.last_decrease >= self.cooldown:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.last_decrease = now
+                Logger.debug("concurrency limit decreased to %.1f", self.limit)
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            CONCURRENCY.set(self.limit)
+
+
+class CircuitOpen(RequestException):
+    """
+    CircuitOpen - the endpoint is failing, the request was not sent
+    """
+
+
+class CircuitBreaker:
+    """
+    CircuitBreaker - fail fast after threshold consecutive failures of an
+    endpoint, then let one probe request through every reset_timeout seconds
+    A probe that never reports back is given up after reset_timeout, so
+    the circuit cannot stay open for good.
+    """
+
+    def __init__(self, name, threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.probe_started = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """
+        allow - raise CircuitOpen unless the request can be sent
+        """
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return
+            now = time.monotonic()
+            if state == "half-open" and (not self.probing or now - self.probe_started >= self.reset_timeout):
+                self.probing = True
+                self.probe_started = now
+                return
+        raise CircuitOpen(f"Circuit open for {self.name}, upstream is failing")
+
+    def on_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+            BREAKER.set(0, endpoint=self.name)
+
+    def on_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.threshold:
+                if self.opened_at is None or self.probing:
+                    Logger.warning("Circuit open for %s after %d failures", self.name, self.failures)
+                self.opened_at = time.monotonic()
+                BREAKER.set(1, endpoint=self.name)
+            self.probing = False
+
+
+LIMITER = AdaptiveLimiter()
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """
+    get_breaker - the circuit breaker of the endpoint
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
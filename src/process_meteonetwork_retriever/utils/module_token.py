@@ -0,0 +1,143 @@
+# -----------------------------------------------------------------------------
+# License:
+# Copyright (c) 2025 Gecosistema S.r.l.
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# Name:        module_token.py
+# Purpose:     MeteoNetwork access token shared by the processes of a host
+#
+# Author:      Luzzi Valerio
+#
+# Created:     19/10/2026
+# -----------------------------------------------------------------------------
+import os
+import json
+import time
+import threading
+from filelock import FileLock
+from .filesystem import private_dir, user_tempdir
+from ..cli.module_log import Logger
+
+# tokens are refreshed this many seconds before they expire
+REFRESH_MARGIN = 300
+TOKEN_TTL = 24 * 3600
+
+
+def login():
+    """
+    login - a new access token from the MeteoNetwork API
+    Credentials are METEONETWORK_EMAIL and METEONETWORK_PASSWORD.
+    :return: (token, expires_in) or (None, 0) without credentials
+    """
+    from .module_http import API_URL, api_request
+    email = os.environ.get("METEONETWORK_EMAIL")
+    password = os.environ.get("METEONETWORK_PASSWORD")
+    if not email or not password:
+        return None, 0
+    response = api_request("POST", f"{API_URL}/login", data={"email": email, "password": password})
+    if response is None or response.status_code != 200:
+        Logger.error("MeteoNetwork login failed: HTTP %s", getattr(response, "status_code", None))
+        return None, 0
+    data = response.json()
+    return data.get("access_token"), int(data.get("expires_in") or TOKEN_TTL)
+
+
+class TokenManager:
+    """
+    TokenManager - access token cached in memory and in a FileLock-protected
+    file shared by the processes of the host. Only one caller refreshes it,
+    the others wait for that refresh and reuse its token.
+    """
+
+    def __init__(self, fetch=login, path=None, margin=REFRESH_MARGIN):
+        self.fetch = fetch
+        self.path = path or f"{user_tempdir(__package__)}/token.json"
+        self.margin = margin
+        self.token = None
+        self.expires = 0.0
+        self.lock = threading.Lock()
+        private_dir(os.path.dirname(self.path))
+        self.filelock = FileLock(f"{self.path}.lock")
+
+    def _fresh(self, expires):
+        return expires - time.time() > self.margin
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as stream:
+                data = json.load(stream)
+            return data["token"], data["expires"]
+        except (OSError, ValueError, KeyError):
+            return None, 0.0
+
+    def _write(self, token, expires):
+        filename = f"{self.path}.tmp"
+        fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_NOFOLLOW", 0), 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as stream:
+            json.dump({"token": token, "expires": expires}, stream)
+        os.replace(filename, self.path)
+
+    def get(self):
+        """
+        get - a valid token, refreshed if it expires within margin seconds
+        """
+        if os.environ.get("METEONETWORK_TOKEN"):
+            return os.environ["METEONETWORK_TOKEN"]
+        if self.token and self._fresh(self.expires):
+            return self.token
+        with self.lock:
+            if self.token and self._fresh(self.expires):
+                return self.token
+            with self.filelock:
+                token, expires = self._read()
+                if not (token and self._fresh(expires)):
+                    token, expires_in = self.fetch()
+                    if not token:
+                        return None
+                    expires = time.time() + expires_in
+                    self._write(token, expires)
+                    Logger.debug("MeteoNetwork token refreshed, valid for %ds", expires_in)
+            self.token, self.expires = token, expires
+            return token
+
+    def invalidate(self, token=None):
+        """
+        invalidate - drop the token, e.g. after a 401, so the next get refreshes
+        """
+        with self.lock, self.filelock:
+            current, _ = self._read()
+            if token is None or current == token:
+                self._write(None, 0.0)
+            self.token, self.expires = None, 0.0
+
+    def headers(self):
+        """
+        headers - the Authorization header, empty without a token
+        """
+        token = self.get()
+        return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+_manager = None
+
+
+def get_token_manager():
+    """
+    get_token_manager - the token manager of this process
+    """
+    global _manager
+    if _manager is None:
+        _manager = TokenManager()
+    return _manager
@@ -22,7 +22,12 @@
 #
 # Created:     26/10/2023
 # -----------------------------------------------------------------------------
+import re
+import types
+import typing
 import inspect
+import functools
+from ..cli.module_log import Logger
 
 
 def is_string(s):
@@ -89,38 +94,172 @@ def get_default_values(func):
     """
     get_default_values
     """
-    signature = inspect.signature(func)
-    return {
-        k:  v.default if v.default is not inspect.Parameter.empty else None
-        for k, v in signature.parameters.items()
-    }
+    return {name: field.default for name, field in compile_schema(func).fields.items()}
+
+
+INT_RE = re.compile(r"^\s*[+-]?\d+\s*$")
+FLOAT_RE = re.compile(r"^\s*[+-]?(\d+\.?\d*(e[+-]?\d+)?|\.\d+(e[+-]?\d+)?|nan|inf|infinity)\s*$", re.IGNORECASE)
+
+
+def coerce_auto(value):
+    """
+    coerce_auto - "true"/"false" to bool, numeric strings to int or float
+    """
+    if not is_string(value):
+        return value
+    lower = value.lower()
+    if lower == "true":
+        return True
+    elif lower == "false":
+        return False
+    elif INT_RE.match(value):
+        return int(value)
+    elif FLOAT_RE.match(value):
+        return float(value)
+    return value
+
+
+BOOL_WORDS = {"yes": True, "no": False, "on": True, "off": False}
+
+
+def coerce_bool(value):
+    if is_string(value) and value.strip().lower() in BOOL_WORDS:
+        return BOOL_WORDS[value.strip().lower()]
+    value = coerce_auto(value)
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return bool(value)
+    raise ValueError(f"expected a boolean, got {value!r}")
+
+
+def _coerce_number(type):
+    def coerce(value):
+        value = coerce_auto(value)
+        if value is None:
+            return None
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if type is float or float(value).is_integer():
+                return type(value)
+        raise ValueError(f"expected {type.__name__}, got {value!r}")
+    return coerce
+
+
+def coerce_list(value):
+    return listify(value, trim=True) if value is not None else None
+
+
+# str is not here: str parameters are coerced with coerce_auto, as the
+# callers of parse_event expect "10" or "true" to arrive as 10 or True
+COERCERS = {
+    bool: coerce_bool,
+    int: _coerce_number(int),
+    float: _coerce_number(float),
+    list: coerce_list,
+    tuple: coerce_list,
+}
+
+
+def _coercer(annotation, default):
+    """
+    _coercer - the coercion of a parameter, from its annotation or default
+    Optional[X] and X | None are coerced as X; without a usable type the
+    values are coerced with coerce_auto, as parse_event always did.
+    """
+    if annotation is not inspect.Parameter.empty:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        if typing.get_origin(annotation) in (typing.Union, types.UnionType) and len(args) == 1:
+            annotation = args[0]
+        annotation = typing.get_origin(annotation) or annotation
+        if annotation in COERCERS:
+            return COERCERS[annotation]
+    if isinstance(default, bool):
+        return coerce_bool
+    return coerce_auto
+
+
+class Field:
+    """
+    Field - a parameter of the schema: default value and coercion
+    """
+    __slots__ = ("default", "coerce")
+
+    def __init__(self, default, coerce):
+        self.default = default
+        self.coerce = coerce
+
+
+class EventSchema:
+    """
+    EventSchema - coercion plan of the parameters of a function, built once
+    """
+
+    def __init__(self, func):
+        self.name = getattr(func, "__name__", str(func))
+        self.fields = {}
+        for name, param in inspect.signature(func).parameters.items():
+            if param.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD):
+                continue
+            default = param.default if param.default is not inspect.Parameter.empty else None
+            coerce = _coercer(param.annotation, default)
+            try:
+                default = coerce(default)
+            except ValueError:
+                pass
+            self.fields[name] = Field(default, coerce)
+        self.defaults = {name: field.default for name, field in self.fields.items()}
+
+    def validate(self, event):
+        """
+        validate - (kwargs, errors) of an event
+        errors is a list of {"key", "error"}, unknown keys included. A value
+        that does not match its type is still coerced with coerce_auto.
+        """
+        kwargs = self.defaults.copy()
+        errors = []
+        fields = self.fields
+        for key, value in event.items():
+            field = fields.get(key)
+            if field is None:
+                errors.append({"key": key, "error": f"Option <{key}> is not available"})
+                continue
+            try:
+                kwargs[key] = field.coerce(value)
+            except ValueError as ex:
+                kwargs[key] = coerce_auto(value)
+                errors.append({"key": key, "error": f"Option <{key}>: {ex}"})
+        return kwargs, errors
+
+
+@functools.lru_cache(maxsize=None)
+def compile_schema(func):
+    """
+    compile_schema - the EventSchema of func, cached
+    """
+    return EventSchema(func)
+
+
+def validate_event(event, func):
+    """
+    validate_event - (kwargs, errors) of an event for func
+    """
+    return compile_schema(func).validate(event)
+
+
+def parse_events(events, func):
+    """
+    parse_events - validate a batch of events with one schema
+    :return: list of (kwargs, errors)
+    """
+    schema = compile_schema(func)
+    return [schema.validate(event) for event in events]
 
 
 def parse_event(event, func):
     """
     parse_event
     """
-    # Copy the event to avoid side effects
-    # kwargs = defaults.copy()
-    kwargs = get_default_values(func)
-
-    # Update kwargs with event
-    for key in event:
-        if key in kwargs:
-            kwargs[key] = event[key]
-        else:
-            print(f"Option <{key}> is not available")
-
-    # patch numeric and boolean params because can be passed as string
-    for key in kwargs:
-        value = kwargs[key]
-        if is_string(value):
-            if value.lower() == "true":
-                kwargs[key] = True
-            elif value.lower() == "false":
-                kwargs[key] = False
-            elif is_integer(value):
-                kwargs[key] = int(value)
-            elif is_float(value):
-                kwargs[key] = float(value)
+    kwargs, errors = validate_event(event, func)
+    for error in errors:
+        Logger.warning(error["error"])
     return kwargs
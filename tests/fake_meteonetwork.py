@@ -0,0 +1,197 @@
+"""
+Local stand-in of the MeteoNetwork API, serving synthetic stations and
+observations with configurable latency, rate limit, 429s and payload size.
+It also accepts the job status PATCHes of set_status on /api/jobs/status.
+"""
+import json
+import math
+import time
+import random
+import threading
+import datetime
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class FakeMeteoNetwork:
+    """
+    FakeMeteoNetwork - fake API server, use it as a context manager
+
+        with FakeMeteoNetwork(n_stations=50, latency=0.01) as api:
+            requests.get(f"{api.url}/stations")
+    """
+
+    def __init__(self, n_stations=100, rows=96, step=15, latency=0.0, rate_limit=None,
+                 error_rate=0.0, padding=0, seed=0):
+        """
+        :param n_stations: number of synthetic stations
+        :param rows: max number of observations per response
+        :param step: minutes between two observations
+        :param latency: seconds added to each response
+        :param rate_limit: max requests per second, beyond that 429 + Retry-After
+        :param error_rate: fraction of the requests answered with a random 429
+        :param padding: bytes of padding added to each observation
+        """
+        self.rows = rows
+        self.step = step
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.padding = "x" * padding
+        self.random = random.Random(seed)
+        self.stations = [{
+            "station_code": f"fak{i:04d}",
+            "name": f"Station {i}",
+            "latitude": round(36.5 + self.random.random() * 10.5, 5),
+            "longitude": round(6.5 + self.random.random() * 12.0, 5),
+            "altitude": self.random.randint(0, 2500),
+        } for i in range(n_stations)]
+        self.requests = 0
+        self.throttled = 0
+        self.revalidated = 0
+        self.lock = threading.Lock()
+        self.window = (time.time(), 0)
+        self.statuses = {}
+        self.server = None
+
+    @property
+    def url(self):
+        """
+        url - root of the fake API
+        """
+        return f"http://127.0.0.1:{self.server.server_port}/v3"
+
+    def start(self):
+        """
+        start - serve in a background thread
+        """
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                api.handle(self, "GET")
+
+            def do_POST(self):
+                api.handle(self, "POST")
+
+            def do_PATCH(self):
+                api.handle(self, "PATCH")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """
+        stop - shutdown the server
+        """
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def throttle(self):
+        """
+        throttle - True if the request must be answered with 429
+        """
+        with self.lock:
+            self.requests += 1
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.throttled += 1
+                return True
+            if self.rate_limit:
+                start, count = self.window
+                now = time.time()
+                if now - start >= 1.0:
+                    start, count = now, 0
+                self.window = (start, count + 1)
+                if count + 1 > self.rate_limit:
+                    self.throttled += 1
+                    return True
+        return False
+
+    def observations(self, station, start, end):
+        """
+        observations - synthetic observations of station between start and end
+        """
+        res = []
+        t = start
+        while t <= end and len(res) < self.rows:
+            hours = t.timestamp() / 3600
+            res.append({
+                "station_code": station["station_code"],
+                "observation_time_utc": t.strftime("%Y-%m-%d %H:%M:%S"),
+                "latitude": station["latitude"],
+                "longitude": station["longitude"],
+                "temperature": round(15 + 8 * math.sin(2 * math.pi * (hours % 24) / 24), 2),
+                "rh": 60,
+                "wind_speed": 3.0,
+                "wind_gust": 7.5,
+                "rain_rate": 0.0,
+                "daily_rain": 0.0,
+                "padding": self.padding,
+            })
+            t += datetime.timedelta(minutes=self.step)
+        return res
+
+    def handle(self, request, method):
+        """
+        handle - route a request
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        if self.throttle():
+            return self.reply(request, 429, {"message": "Too Many Requests"}, {"Retry-After": "1"})
+
+        url = urlparse(request.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        path = url.path.rstrip("/").split("/")[2:]  # drop /v3
+
+        if method == "PATCH" and path[:2] == ["jobs", "status"] and len(path) == 3:
+            length = int(request.headers.get("Content-Length", 0))
+            data = json.loads(request.rfile.read(length) or b"{}")
+            self.statuses[path[2]] = data
+            return self.reply(request, 200, data)
+        if method == "POST" and path == ["login"]:
+            return self.reply(request, 200, {"access_token": f"token-{time.time()}", "token_type": "Bearer",
+                                             "expires_in": 3600})
+        if path == ["stations"]:
+            if request.headers.get("If-None-Match") == '"stations"':
+                self.revalidated += 1
+                request.send_response(304)
+                request.send_header("ETag", '"stations"')
+                return request.end_headers()
+            return self.reply(request, 200, self.stations, {"Cache-Control": "max-age=3600", "ETag": '"stations"'})
+        if len(path) == 2 and path[0] in ("data-realtime", "data-daily"):
+            station = next((s for s in self.stations if s["station_code"] == path[1]), None)
+            if station is None:
+                return self.reply(request, 404, {"message": "Station not found"})
+            end = datetime.datetime.fromisoformat(query["end"]) if "end" in query else \
+                datetime.datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0, tzinfo=None)
+            start = datetime.datetime.fromisoformat(query["start"]) if "start" in query else \
+                end - datetime.timedelta(minutes=self.step * (self.rows - 1))
+            return self.reply(request, 200, self.observations(station, start, end))
+        return self.reply(request, 404, {"message": "Not found"})
+
+    @staticmethod
+    def reply(request, status, data, headers=None):
+        """
+        reply - send a json response
+        """
+        body = json.dumps(data).encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            request.send_header(key, value)
+        request.end_headers()
+        request.wfile.write(body)
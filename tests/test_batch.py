@@ -0,0 +1,47 @@
+import json
+import tempfile
+import unittest
+from unittest import mock
+from requests.exceptions import ConnectionError
+from process_meteonetwork_retriever.batch import run_batch
+
+
+def square(n: int = 0, fail: bool = False):
+    if fail:
+        raise ValueError("job failed")
+    return n * n
+
+
+class TestBatch(unittest.TestCase):
+    """
+    TestBatch - the jobs of a manifest in a process pool
+    """
+
+    def setUp(self):
+        self.manifest = f"{tempfile.mkdtemp()}/jobs.json"
+        with open(self.manifest, "w", encoding="utf-8") as stream:
+            json.dump([{"jid": "a", "n": "3"}, {"jid": "b", "n": 4}, {"jid": "c", "fail": "true"}], stream)
+
+    def test_run_batch(self):
+        summary = run_batch(self.manifest, workers=2, func=square)
+        self.assertEqual((summary["jobs"], summary["ok"], summary["failed"]), (3, 2, 1))
+        results = {res["job"]: res for res in summary["results"]}
+        self.assertEqual((results["a"]["result"], results["b"]["result"]), (9, 16))
+        self.assertEqual(results["c"]["error"], "job failed")
+
+    def test_login_error(self):
+        manager = mock.Mock()
+        manager.get.side_effect = ConnectionError("login unreachable")
+        with mock.patch("process_meteonetwork_retriever.batch.get_token_manager", return_value=manager):
+            summary = run_batch(self.manifest, workers=2, func=f"{__name__}:square")
+        self.assertEqual(summary["ok"], 2)
+
+    def test_no_function(self):
+        from process_meteonetwork_retriever import run_meteonetwork_retriever
+        if run_meteonetwork_retriever is not None:
+            self.skipTest("run_meteonetwork_retriever is available")
+        self.assertRaises(ValueError, run_batch, self.manifest)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import time
+import unittest
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from fake_meteonetwork import FakeMeteoNetwork
+from process_meteonetwork_retriever.utils import module_http
+from process_meteonetwork_retriever.utils.strings import parse_event
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    from moto import mock_aws
+except ImportError:
+    mock_aws = None
+
+BENCH_BUCKET = "bench-meteonetwork"
+
+
+def peak_rss_mb():
+    """
+    peak_rss_mb - peak resident set size of this process in MB
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+class Report:
+    """
+    Report - throughput and per-stage time of a benchmark run
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = {}
+        self.requests = 0
+        self.rows = 0
+        self.t0 = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t
+
+    def result(self):
+        elapsed = time.perf_counter() - self.t0
+        res = {
+            "name": self.name,
+            "elapsed": round(elapsed, 3),
+            "requests/s": round(self.requests / elapsed, 1),
+            "rows/s": round(self.rows / elapsed, 1),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": {k: round(v, 3) for k, v in self.stages.items()},
+        }
+        print(json.dumps(res))
+        if os.environ.get("BENCH_REPORT"):
+            with open(os.environ["BENCH_REPORT"], "a", encoding="utf-8") as stream:
+                stream.write(json.dumps(res) + "\n")
+        return res
+
+
+class TestBenchmark(unittest.TestCase):
+    """
+    End-to-end throughput against the local MeteoNetwork stand-in.
+    """
+
+    def setUp(self):
+        self.api = FakeMeteoNetwork(n_stations=int(os.environ.get("BENCH_STATIONS", 200)),
+                                    latency=float(os.environ.get("BENCH_LATENCY", 0.005))).start()
+        self.api_url = module_http.API_URL
+        module_http.API_URL = self.api.url
+
+    def tearDown(self):
+        module_http.API_URL = self.api_url
+        self.api.stop()
+
+    def test_http_throughput(self):
+        """
+        test_http_throughput - stations catalogue plus one realtime call per station
+        """
+        report = Report("http_throughput")
+        with report.stage("stations"):
+            stations = module_http.api_get("stations", cache=False)
+            report.requests += 1
+        with report.stage("observations"), ThreadPoolExecutor(max_workers=8) as executor:
+            urls = [f"data-realtime/{s['station_code']}" for s in stations]
+            for rows in executor.map(lambda url: module_http.api_get(url, cache=False), urls):
+                report.requests += 1
+                report.rows += len(rows)
+        res = report.result()
+        self.assertEqual(self.api.throttled, 0)
+        self.assertEqual(report.requests, len(stations) + 1)
+        self.assertGreater(res["rows/s"], 0)
+
+    def test_run_meteonetwork_retriever(self):
+        """
+        test_run_meteonetwork_retriever - the whole job, writing to a mocked S3 bucket
+        """
+        from process_meteonetwork_retriever import main
+        func = getattr(main, "run_meteonetwork_retriever", None)
+        if func is None:
+            self.skipTest("run_meteonetwork_retriever is not available")
+        if mock_aws is None:
+            self.skipTest("moto is not installed")
+
+        event = json.loads(os.environ.get("BENCH_EVENT", "{}"))
+        event.setdefault("out", f"s3://{BENCH_BUCKET}/bench/out.geojson")
+
+        with mock_aws():
+            import boto3
+            boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BENCH_BUCKET)
+            report = Report("run_meteonetwork_retriever")
+            with report.stage("parse_event"):
+                kwargs = parse_event(event, func)
+            with report.stage("run"):
+                func(**kwargs)
+            report.requests = self.api.requests
+            report.result()
+
+
+if __name__ == '__main__':
+    unittest.main()
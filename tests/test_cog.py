@@ -0,0 +1,75 @@
+import os
+import json
+import tempfile
+import unittest
+import threading
+import numpy as np
+from process_meteonetwork_retriever.utils.module_cog import cog_options, _merge_items, update_time_index, write_cog
+
+
+def raster(dtype="float32"):
+    import xarray as xr
+    da = xr.DataArray(np.arange(256 * 256).reshape(256, 256).astype(dtype), dims=("y", "x"),
+                      coords={"y": np.linspace(46, 44, 256), "x": np.linspace(8, 10, 256)})
+    return da.rio.write_crs("EPSG:4326")
+
+
+def cog_usable():
+    """
+    cog_usable - the rioxarray stack can write a raster, some affine and
+    rioxarray releases do not work together
+    """
+    try:
+        raster().rio.to_raster(f"{tempfile.mkdtemp()}/probe.tif")
+        return True
+    except (ImportError, TypeError):
+        return False
+
+
+class TestCog(unittest.TestCase):
+    """
+    TestCog - COG creation options and the time index of the products
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def test_cog_options(self):
+        self.assertEqual(cog_options("float32")["PREDICTOR"], "3")
+        self.assertEqual(cog_options(np.int16)["PREDICTOR"], "2")
+        options = cog_options("uint8", resampling="nearest", blocksize=256)
+        self.assertEqual((options["driver"], options["BLOCKSIZE"], options["OVERVIEW_RESAMPLING"]),
+                         ("COG", "256", "nearest"))
+
+    def test_merge_items(self):
+        items = [{"time": "2024-01-01T01:00:00", "uri": "a"}, {"time": "2024-01-01T00:00:00", "uri": "b"}]
+        merged = _merge_items(items, [{"time": "2024-01-01T01:00:00", "uri": "c"}])
+        self.assertEqual([(i["time"][11:13], i["uri"]) for i in merged], [("00", "b"), ("01", "c")])
+
+    def test_update_time_index(self):
+        def add(hour):
+            update_time_index(self.root, [{"time": f"2024-01-01T{hour:02d}:00:00", "uri": f"{hour}.tif"}])
+
+        threads = [threading.Thread(target=add, args=(hour,)) for hour in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with open(f"{self.root}/index.json", encoding="utf-8") as stream:
+            index = json.load(stream)
+        self.assertEqual([item["uri"] for item in index["items"]], [f"{hour}.tif" for hour in range(12)])
+        self.assertFalse([name for name in os.listdir(self.root) if name.endswith(".tmp")])
+
+    @unittest.skipUnless(cog_usable(), "the rioxarray stack cannot write rasters here")
+    def test_write_cog(self):
+        import rasterio
+        uri = write_cog(raster(), f"{self.root}/a.tif", nodata=-9999.0)
+        with rasterio.open(uri) as src:
+            self.assertEqual(src.dtypes[0], "float32")
+            self.assertEqual(src.tags(ns="IMAGE_STRUCTURE").get("LAYOUT"), "COG")
+            self.assertEqual(src.nodata, -9999.0)
+        self.assertFalse(os.path.exists(f"{uri}.aux.xml"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from process_meteonetwork_retriever.utils import module_s3
+from process_meteonetwork_retriever.compaction import plan_groups, is_compact, run_compaction
+from process_meteonetwork_retriever.utils.module_manifest import list_files, load_manifest, prune
+
+try:
+    from moto import mock_aws
+except ImportError:
+    mock_aws = None
+
+
+class TestCompaction(unittest.TestCase):
+    """
+    TestCompaction - small files of a partition are merged without losing rows
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.partition = f"{self.root}/station_id==a"
+        os.makedirs(self.partition)
+        # written out of order, the compacted file is sorted by time
+        for i in reversed(range(6)):
+            timestamps = pd.date_range(f"2024-01-0{i + 1}", periods=24, freq="1h", tz="UTC")
+            df = pd.DataFrame({"timestamp": timestamps, "value": float(i)})
+            df.to_parquet(f"{self.partition}/part-{i}.parquet", index=False)
+
+    def test_plan_groups(self):
+        files = [("a", 10), ("b", 10), ("c", 10), ("d", 10), ("e", 10), ("big", 90)]
+        self.assertEqual(plan_groups(files, target_size=25), [[("a", 10), ("b", 10)], [("c", 10), ("d", 10)]])
+        self.assertTrue(is_compact([("a", 10), ("big", 90)], target_size=100))
+
+    def test_dry_run(self):
+        summary = run_compaction(self.root, dry_run=True)
+        self.assertEqual((summary["compacted"], summary["files_before"], summary["files_after"]), (1, 6, 1))
+        self.assertEqual(len(os.listdir(self.partition)), 6)
+        self.assertIsNone(load_manifest(self.root))
+
+    def test_compaction(self):
+        summary = run_compaction(self.root)
+        self.assertEqual(summary["files_after"], 1)
+        (uri, _), = list_files(self.root)
+        df = pd.read_parquet(uri)
+        self.assertEqual(len(df), 6 * 24)
+        self.assertTrue(df["timestamp"].is_monotonic_increasing)
+        self.assertEqual(prune(load_manifest(self.root)), [uri])
+        self.assertFalse(os.path.exists(f"{self.partition}/_compacting"))
+        # already compact
+        self.assertEqual(run_compaction(self.root)["compacted"], 0)
+
+    @unittest.skipIf(mock_aws is None, "moto is not installed")
+    def test_failed_upload(self):
+        with mock_aws():
+            client = module_s3.get_client()
+            client.create_bucket(Bucket="bkt")
+            for i in range(3):
+                module_s3.copy(f"{self.partition}/part-{i}.parquet", f"s3://bkt/root/station_id==a/part-{i}.parquet")
+            with mock.patch.object(module_s3, "s3_upload", return_value=False):
+                self.assertRaises(RuntimeError, run_compaction, "s3://bkt/root")
+            # the merged files are still there and the manifest lists only them
+            files = sorted(uri for uri, _ in list_files("s3://bkt/root"))
+            self.assertEqual(files, [f"s3://bkt/root/station_id==a/part-{i}.parquet" for i in range(3)])
+            self.assertEqual(prune(load_manifest("s3://bkt/root")), files)
+        module_s3._clients.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+import numpy as np
+import pandas as pd
+from process_meteonetwork_retriever.utils.module_dedup import DedupIndex, deduplicate
+
+
+def observations(stations, hours):
+    return pd.DataFrame([{"station_id": s, "variable": "temperature",
+                          "timestamp": pd.Timestamp("2024-01-01", tz="UTC") + pd.Timedelta(hours=h), "value": h}
+                         for s in stations for h in hours])
+
+
+class TestDedup(unittest.TestCase):
+    """
+    TestDedup - each observation is kept once across batches
+    """
+
+    def test_deduplicate(self):
+        df = observations(["a", "b"], range(3))
+        self.assertEqual(len(deduplicate(pd.concat([df, df, df]))), 6)
+
+    def test_streaming_batches(self):
+        index = DedupIndex()
+        kept = [len(index.filter(observations(["a", "b"], range(h, h + 10)))) for h in range(0, 200, 5)]
+        self.assertEqual(kept, [20] + [10] * 39)
+        self.assertEqual(len(index), 2 * 205)
+        self.assertTrue(np.all(np.diff(index.keys) > 0))
+        self.assertLessEqual(len(index.runs), 12)
+
+    def test_seed(self):
+        index = DedupIndex().seed(observations(["a"], range(5)))
+        self.assertEqual(index.isin(observations(["a", "b"], [4])).tolist(), [True, False])
+        self.assertEqual(len(index.filter(observations(["a"], range(10)))), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from process_meteonetwork_retriever.utils import module_s3
+from process_meteonetwork_retriever.utils.module_manifest import load_manifest, plan
+from process_meteonetwork_retriever.utils.module_geoparquet import (
+    read_geoparquet, to_geodataframe, write_geoparquet)
+
+BBOX = (9.0, 45.0, 9.5, 45.5)
+
+
+def observations(n=100000, stations=500, seed=0):
+    rng = np.random.default_rng(seed)
+    station = rng.integers(0, stations, n)
+    lon, lat = rng.uniform(6, 18, stations), rng.uniform(36, 47, stations)
+    return pd.DataFrame({"station_id": station.astype(str), "longitude": lon[station], "latitude": lat[station],
+                         "timestamp": pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(np.arange(n), unit="s"),
+                         "value": 1.0})
+
+
+class TestGeoParquet(unittest.TestCase):
+    """
+    TestGeoParquet - Hilbert sorted row groups are pruned by their bbox
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.df = observations()
+        self.uri = write_geoparquet(self.df, f"{self.root}/day=01/part-0.parquet", root=self.root)
+
+    def test_hilbert_order(self):
+        gdf = read_geoparquet(self.uri)
+        self.assertTrue(np.all(np.diff(gdf.hilbert_distance(level=16).to_numpy()) >= 0))
+        # rows of a station are contiguous and in time order
+        station = gdf[gdf["station_id"] == gdf["station_id"].iloc[0]]
+        self.assertEqual(station.index[-1] - station.index[0] + 1, len(station))
+        self.assertTrue(station["timestamp"].is_monotonic_increasing)
+
+    def test_bbox_pruning(self):
+        metadata = pq.ParquetFile(self.uri).metadata
+        self.assertIn("bbox", pq.read_schema(self.uri).names)
+        columns = {metadata.schema.column(i).path: i for i in range(metadata.num_columns)}
+        xmin, ymin, xmax, ymax = BBOX
+        matching = 0
+        for rg in range(metadata.num_row_groups):
+            stats = {name: metadata.row_group(rg).column(columns[f"bbox.{name}"]).statistics
+                     for name in ("xmin", "ymin", "xmax", "ymax")}
+            matching += stats["xmax"].max >= xmin and stats["xmin"].min <= xmax and \
+                stats["ymax"].max >= ymin and stats["ymin"].min <= ymax
+        self.assertGreater(metadata.num_row_groups, 10)
+        self.assertLess(matching, metadata.num_row_groups / 2)
+
+        res = read_geoparquet(self.uri, bbox=BBOX)
+        inside = self.df[self.df["longitude"].between(xmin, xmax) & self.df["latitude"].between(ymin, ymax)]
+        self.assertEqual(len(res), len(inside))
+        self.assertLess(len(res), len(self.df))
+
+    def test_manifest(self):
+        entry = load_manifest(self.root)["partitions"]["day=01"]["files"]["part-0.parquet"]
+        self.assertEqual(entry["rows"], len(self.df))
+        bounds = to_geodataframe(self.df).total_bounds
+        np.testing.assert_allclose(entry["bbox"], bounds)
+        self.assertEqual(plan(self.root, bbox=[0.0, 0.0, 1.0, 1.0]), [])
+
+    def test_failed_upload(self):
+        root = "s3://bkt/geo"
+        with mock.patch.object(module_s3, "s3_upload", return_value=False), \
+                mock.patch("process_meteonetwork_retriever.utils.module_geoparquet.update_manifest") as update:
+            self.assertRaises(RuntimeError, write_geoparquet, self.df[:100], f"{root}/part-0.parquet", root=root)
+        update.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
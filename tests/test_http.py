@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from fake_meteonetwork import FakeMeteoNetwork
+from process_meteonetwork_retriever.utils import module_http
+from process_meteonetwork_retriever.utils.module_http import (
+    HttpCache, api_get, normalize_key, cache_control_ttl)
+
+
+class TestHttp(unittest.TestCase):
+    """
+    TestHttp - on-disk response cache of the API calls
+    """
+
+    def setUp(self):
+        self.api = FakeMeteoNetwork(n_stations=5).start()
+        self.addCleanup(self.api.stop)
+        patcher = mock.patch.object(module_http, "API_URL", self.api.url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.dict(os.environ, {"METEONETWORK_TOKEN": "test"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = HttpCache(f"{tempfile.mkdtemp()}/cache.sqlite")
+
+    def test_normalize_key(self):
+        self.assertEqual(normalize_key("HTTP://Api.X/v3/data/?b=2&a=1"),
+                         normalize_key("http://api.x/v3/data", {"a": 1, "b": 2, "c": None}))
+
+    @unittest.skipUnless(hasattr(os, "getuid"), "posix only")
+    def test_private_cache(self):
+        shared = os.path.join(tempfile.mkdtemp(), "shared")
+        os.makedirs(shared)
+        os.chmod(shared, 0o777)
+        self.assertRaises(PermissionError, HttpCache, f"{shared}/cache.sqlite")
+        self.assertEqual(os.stat(os.path.dirname(HttpCache().path)).st_mode & 0o777, 0o700)
+
+    def test_cache_control_ttl(self):
+        self.assertEqual(cache_control_ttl({"Cache-Control": "public, max-age=60"}), 60)
+        self.assertEqual(cache_control_ttl({"Cache-Control": "no-cache"}), 0)
+        self.assertIsNone(cache_control_ttl({"Cache-Control": "no-store"}))
+
+    def test_hit(self):
+        stations = api_get("stations", cache=self.cache)
+        self.assertEqual(len(stations), 5)
+        self.assertEqual(api_get("stations", cache=self.cache), stations)
+        self.assertEqual(self.api.requests, 1)
+
+    def test_revalidate(self):
+        api_get("stations", cache=self.cache, ttl=0)
+        # stale: revalidated with If-None-Match, the body comes from the cache
+        self.assertEqual(len(api_get("stations", cache=self.cache, ttl=0)), 5)
+        self.assertEqual((self.api.requests, self.api.revalidated), (2, 1))
+
+    def test_eviction(self):
+        cache = HttpCache(f"{tempfile.mkdtemp()}/cache.sqlite", max_size=2000)
+        for i in range(10):
+            cache.put(f"k{i}", 200, {}, os.urandom(500), 60)
+        self.assertIsNone(cache.get("k0"))
+        self.assertIsNotNone(cache.get("k9"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+import importlib.util
+from unittest import mock
+from process_meteonetwork_retriever.utils.module_lease import job_status
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_lambda():
+    spec = importlib.util.spec_from_file_location(
+        "lambda_function", os.path.join(HERE, "..", "lambda", "lambda_function.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def retriever(stations: list = None, variables: str = None):
+    return {"stations": stations, "variables": variables}
+
+
+class Context:
+    aws_request_id = "request-1"
+
+    def get_remaining_time_in_millis(self):
+        return 900 * 1000
+
+
+class TestLambda(unittest.TestCase):
+    """
+    TestLambda - coordinator and worker invocations on a local lease root
+    """
+
+    def setUp(self):
+        self.lease_root = tempfile.mkdtemp()
+        self.module = load_lambda()
+        patcher = mock.patch.dict(os.environ, {"METEONETWORK_FUNCTION": "test_lambda:retriever"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_coordinator_worker(self):
+        event = {"mode": "coordinator", "lease_root": self.lease_root, "unit_size": 2,
+                 "stations": "a,b,c", "variables": "temperature"}
+        res = self.module.lambda_handler(event, Context())
+        self.assertEqual(res["statusCode"], 200)
+        self.assertEqual(len(res["body"]["result"]), 2)
+        self.assertIn("metrics", res["body"])
+
+        res = self.module.lambda_handler({"mode": "worker", "lease_root": self.lease_root}, Context())
+        results = sorted(res["body"]["result"].values(), key=lambda r: r["stations"])
+        self.assertEqual(results, [{"stations": ["a", "b"], "variables": "temperature"},
+                                   {"stations": ["c"], "variables": "temperature"}])
+        self.assertEqual(job_status(self.lease_root)["done"], 2)
+
+    def test_single_event(self):
+        res = self.module.lambda_handler({"stations": "a", "variables": "rh"}, None)
+        self.assertEqual(res["body"]["result"], {"stations": ["a"], "variables": "rh"})
+
+    def test_no_function(self):
+        del os.environ["METEONETWORK_FUNCTION"]
+        with mock.patch("process_meteonetwork_retriever.run_meteonetwork_retriever", None):
+            self.assertRaisesRegex(ValueError, "METEONETWORK_FUNCTION", self.module.lambda_handler, {}, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import time
+import tempfile
+import unittest
+import threading
+from process_meteonetwork_retriever.utils.module_lease import (
+    LocalBackend, Lease, split_event, publish_units, run_worker, job_status)
+
+
+class TestLease(unittest.TestCase):
+    """
+    TestLease - work units and leases on the local backend
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def test_split_event(self):
+        units = split_event({"mode": "coordinator", "stations": "a,b,c,d,e", "variable": "t"}, size=2)
+        self.assertEqual([u["stations"] for u in units], [["a", "b"], ["c", "d"], ["e"]])
+        self.assertTrue(all(u["variable"] == "t" and "mode" not in u for u in units))
+
+    def test_exactly_once(self):
+        publish_units(self.root, [{"n": i} for i in range(20)])
+        seen, lock = [], threading.Lock()
+
+        def func(unit):
+            time.sleep(0.01)
+            with lock:
+                seen.append(unit["n"])
+            return unit["n"]
+
+        workers = [threading.Thread(target=run_worker, args=(self.root, func)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(sorted(seen), list(range(20)))
+        self.assertEqual(job_status(self.root),
+                         {"units": 20, "done": 20, "failed": 0, "pending": 0, "failed_units": []})
+
+    def test_failing_unit(self):
+        ids = publish_units(self.root, [{"n": i} for i in range(3)])
+        calls = []
+
+        def func(unit):
+            calls.append(unit["n"])
+            if unit["n"] == 1:
+                raise ValueError("bad unit")
+            return unit["n"]
+
+        res = run_worker(self.root, func, max_attempts=3, backoff=0, deadline=time.time() + 5)
+        self.assertEqual(sorted(res), [ids[0], ids[2]])
+        self.assertEqual(calls.count(1), 3)
+        status = job_status(self.root)
+        self.assertEqual((status["done"], status["failed"], status["pending"]), (2, 1, 0))
+        self.assertEqual(status["failed_units"], [ids[1]])
+
+    def test_backoff(self):
+        publish_units(self.root, [{"n": 0}])
+
+        def func(unit):
+            raise ValueError("bad unit")
+
+        t = time.time()
+        run_worker(self.root, func, backoff=60)
+        self.assertLess(time.time() - t, 1)
+        self.assertEqual(job_status(self.root)["pending"], 1)
+
+    def test_takeover(self):
+        backend = LocalBackend(self.root)
+        stalled = Lease(backend, "u000000", owner="a", ttl=0.1)
+        self.assertTrue(stalled.acquire())
+        other = Lease(backend, "u000000", owner="b", ttl=60)
+        self.assertFalse(other.acquire())
+        time.sleep(0.2)
+        self.assertTrue(other.acquire())
+        self.assertFalse(stalled.renew())
+        self.assertTrue(other.renew())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import logging
+import tempfile
+import textwrap
+import unittest
+import threading
+import subprocess
+import contextvars
+from unittest import mock
+from process_meteonetwork_retriever.cli import module_log
+from process_meteonetwork_retriever.cli.module_log import (
+    Logger, RateLimitFilter, clear_job_log, flush_log, get_job_log, log_span, set_log_context)
+
+SCRIPT = textwrap.dedent("""
+    import sys, multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from process_meteonetwork_retriever.cli.module_log import Logger
+
+    def work(i):
+        Logger.warning("child %d", i)
+        return i
+
+    if __name__ == "__main__":
+        with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context(sys.argv[1])) as executor:
+            list(executor.map(work, range(4)))
+""")
+
+
+class TestLog(unittest.TestCase):
+    """
+    TestLog - records of the worker processes are not lost
+    """
+
+    def run_script(self, method):
+        with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as stream:
+            stream.write(SCRIPT)
+        try:
+            res = subprocess.run([sys.executable, stream.name, method], capture_output=True, text=True, timeout=60)
+        finally:
+            os.unlink(stream.name)
+        return res.stderr
+
+    @unittest.skipUnless(hasattr(os, "fork"), "fork is not available")
+    def test_fork(self):
+        stderr = self.run_script("fork")
+        self.assertEqual(sorted(line for line in stderr.splitlines() if "child" in line),
+                         [f"[WARNING ] child {i}" for i in range(4)])
+
+    def test_spawn(self):
+        stderr = self.run_script("spawn")
+        self.assertEqual(sum("child" in line for line in stderr.splitlines()), 4)
+
+
+def record(msg, lineno=1):
+    return logging.LogRecord("test", logging.ERROR, __file__, lineno, msg, None, None)
+
+
+class TestLogFormat(unittest.TestCase):
+    """
+    TestLogFormat - rate limiting, json records and the job buffer
+    """
+
+    def test_rate_limit(self):
+        limiter = RateLimitFilter(burst=3, period=60.0)
+        self.assertEqual([limiter.filter(record("x")) for _ in range(5)], [True] * 3 + [False] * 2)
+        self.assertTrue(limiter.filter(record("x", lineno=2)))
+        with mock.patch("time.monotonic", return_value=module_log.time.monotonic() + 61):
+            passed = record("x")
+            self.assertTrue(limiter.filter(passed))
+            self.assertEqual(passed.suppressed, 2)
+
+    def test_rate_limit_pruned(self):
+        limiter = RateLimitFilter(burst=3, period=60.0)
+        for i in range(100):
+            limiter.filter(record(f"error {i}"))
+        with mock.patch("time.monotonic", return_value=module_log.time.monotonic() + 61):
+            limiter.filter(record("later"))
+        self.assertEqual(len(limiter.windows), 1)
+
+    def test_job_log(self):
+        def job():
+            clear_job_log()
+            set_log_context(jid="job-1")
+            with log_span("fetch"):
+                Logger.warning("fetched %d rows", 3)
+            Logger.error("done")
+            return [json.loads(line) for line in get_job_log().splitlines()]
+
+        lines = contextvars.copy_context().run(job)
+        self.assertEqual([(r["message"], r["jid"], r["span"], r["level"]) for r in lines],
+                         [("fetched 3 rows", "job-1", "fetch", "WARNING"), ("done", "job-1", None, "ERROR")])
+        self.assertEqual(get_job_log(), "")
+
+    def test_concurrent_flush(self):
+        errors = []
+
+        def work(i):
+            try:
+                for j in range(50):
+                    Logger.debug("thread %d record %d", i, j)
+                    flush_log()
+            except Exception as ex:
+                errors.append(ex)
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertTrue(module_log._listener._thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from process_meteonetwork_retriever.utils.module_manifest import (
+    file_stats, load_manifest, update_manifest, rebuild_manifest, plan, KEEP_SNAPSHOTS)
+
+
+def write(root, station, day, lon=9.0):
+    df = pd.DataFrame({"station_id": station, "lon": lon, "lat": 45.0,
+                       "timestamp": pd.date_range(f"2024-01-{day:02d}", periods=24, freq="1h", tz="UTC")})
+    uri = f"{root}/station_id=={station}/day={day:02d}.parquet"
+    os.makedirs(os.path.dirname(uri), exist_ok=True)
+    df.to_parquet(uri, index=False)
+    return uri, file_stats(df, os.path.getsize(uri))
+
+
+class TestManifest(unittest.TestCase):
+    """
+    TestManifest - transactional manifest and the pruning of the query plan
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def test_file_stats(self):
+        _, stats = write(self.root, "a", 1)
+        self.assertEqual((stats["rows"], stats["stations"], stats["bbox"]), (24, ["a"], [9.0, 45.0, 9.0, 45.0]))
+        self.assertEqual(stats["time_min"], "2024-01-01T00:00:00+00:00")
+
+    def test_plan(self):
+        files = dict([write(self.root, "a", 1), write(self.root, "a", 2), write(self.root, "b", 1, lon=12.0)])
+        update_manifest(self.root, add=files)
+        self.assertEqual(len(plan(self.root)), 3)
+        self.assertEqual(plan(self.root, start="2024-01-02T06:00"), [f"{self.root}/station_id==a/day=02.parquet"])
+        self.assertEqual(plan(self.root, stations=["b"]), [f"{self.root}/station_id==b/day=01.parquet"])
+        self.assertEqual(len(plan(self.root, bbox=[8.0, 44.0, 10.0, 46.0])), 2)
+
+    def test_remove_and_snapshots(self):
+        uri, stats = write(self.root, "a", 1)
+        for _ in range(KEEP_SNAPSHOTS + 2):
+            update_manifest(self.root, add={uri: stats})
+        manifest = update_manifest(self.root, remove=[uri])
+        self.assertEqual(manifest["partitions"], {})
+        self.assertEqual(load_manifest(self.root, version=manifest["version"] - 1)["partitions"]["station_id==a"]["rows"], 24)
+        self.assertIsNone(load_manifest(self.root, version=1))
+
+    def test_concurrent_commits(self):
+        files = [write(self.root, f"s{i}", 1) for i in range(8)]
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(lambda f: update_manifest(self.root, add=dict([f])), files))
+        manifest = load_manifest(self.root)
+        self.assertEqual((manifest["version"], len(manifest["partitions"])), (8, 8))
+
+    def test_rebuild(self):
+        write(self.root, "a", 1)
+        self.assertIsNone(load_manifest(self.root))
+        self.assertEqual(len(plan(self.root)), 1)  # listing fallback
+        manifest = rebuild_manifest(self.root)
+        self.assertEqual(manifest["partitions"]["station_id==a"]["stations"], ["a"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from process_meteonetwork_retriever.utils import module_metrics
+from process_meteonetwork_retriever.utils.module_metrics import Registry, instrument
+
+
+class TestMetrics(unittest.TestCase):
+    """
+    TestMetrics - counters, gauges and histograms and their exposition
+    """
+
+    def test_counter_gauge(self):
+        registry = Registry()
+        registry.counter("rows", "Rows written").inc(3, table="obs")
+        registry.counter("rows").inc(2, table="obs")
+        gauge = registry.gauge("inflight")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        text = registry.to_openmetrics()
+        self.assertIn('rows_total{table="obs"} 5', text)
+        self.assertIn("# HELP rows Rows written", text)
+        self.assertIn("inflight 1", text)
+        self.assertTrue(text.endswith("# EOF\n"))
+
+    def test_histogram(self):
+        registry = Registry()
+        latency = registry.histogram("latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            latency.observe(value, endpoint="stations")
+        samples = {(s["name"], s["labels"].get("le")): s["value"] for s in registry.to_json()["latency"]}
+        self.assertEqual(samples[("latency_bucket", "0.1")], 1)
+        self.assertEqual(samples[("latency_bucket", "1.0")], 2)
+        self.assertEqual(samples[("latency_bucket", "+Inf")], 3)
+        self.assertEqual(samples[("latency_count", None)], 3)
+        self.assertAlmostEqual(samples[("latency_sum", None)], 5.55)
+
+    def test_reset_and_write(self):
+        registry = Registry()
+        registry.counter("calls").inc()
+        registry.reset()
+        self.assertEqual(registry.to_json(), {"calls": []})
+        filename = registry.write_openmetrics(os.path.join(tempfile.mkdtemp(), "metrics.prom"))
+        with open(filename, encoding="utf-8") as stream:
+            self.assertIn("# TYPE calls counter", stream.read())
+        self.assertFalse(os.path.exists(f"{filename}.tmp"))
+
+    def test_instrument(self):
+        @instrument("upload", prefix="test_instrument")
+        def upload(ok):
+            if ok is None:
+                raise ValueError("boom")
+            return ok
+
+        upload(True)
+        upload(False)
+        self.assertRaises(ValueError, upload, None)
+        calls = module_metrics.REGISTRY.metrics["test_instrument_operations"].values
+        self.assertEqual(calls[(("operation", "upload"), ("outcome", "ok"))], 1)
+        self.assertEqual(calls[(("operation", "upload"), ("outcome", "error"))], 2)
+        latency = module_metrics.REGISTRY.metrics["test_instrument_operation_seconds"].values
+        self.assertEqual(latency[(("operation", "upload"),)][2], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+Micro-benchmarks of the s3, filesystem and status hot paths, offline:
+S3 is mocked with moto and the status backend is the local FakeMeteoNetwork.
+They are deselected by default, run them with -m microbench:
+
+    pytest tests/test_microbench.py -m microbench --benchmark-autosave
+    pytest tests/test_microbench.py -m microbench --benchmark-compare --benchmark-compare-fail=mean:25%
+
+--benchmark-autosave stores each run under .benchmarks/, --benchmark-compare
+compares with the last stored run and fails on a regression of the mean.
+Each benchmark also has an absolute ceiling on its mean, scaled by
+BENCH_SLOWDOWN on slow machines (CI runners).
+"""
+import os
+import pytest
+from fake_meteonetwork import FakeMeteoNetwork
+
+pytest.importorskip("pytest_benchmark")
+moto = pytest.importorskip("moto")
+
+import boto3  # noqa: E402
+from process_meteonetwork_retriever.utils import module_s3  # noqa: E402
+from process_meteonetwork_retriever.utils.filesystem import md5sum  # noqa: E402
+from process_meteonetwork_retriever.utils.module_status import set_status  # noqa: E402
+
+pytestmark = pytest.mark.microbench
+
+BUCKET = "bench-microbench"
+SLOWDOWN = float(os.environ.get("BENCH_SLOWDOWN", 1.0))
+
+# ceilings of the mean time in seconds, an order of magnitude above a laptop
+CEILINGS = {
+    "get_client_cold": 0.5,
+    "get_client_warm": 0.001,
+    "s3_list": 5.0,
+    "copy_to_s3": 5.0,
+    "move_s3": 5.0,
+    "md5sum": 1.0,
+    "tmp_clean": 0.05,
+    "set_status": 0.1,
+}
+
+
+def check_ceiling(benchmark, name):
+    if benchmark.stats is None:  # --benchmark-disable, a single plain run
+        return
+    mean = benchmark.stats.stats.mean
+    assert mean <= CEILINGS[name] * SLOWDOWN, f"{name}: mean {mean:.6f}s over {CEILINGS[name] * SLOWDOWN}s"
+
+
+@pytest.fixture
+def s3():
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def files(tmp_path):
+    """
+    files - 50 small local files
+    """
+    res = []
+    for i in range(50):
+        filename = tmp_path / f"part-{i:03d}.csv"
+        filename.write_bytes(os.urandom(4096))
+        res.append(str(filename))
+    return res
+
+
+def test_get_client_cold(benchmark, s3):
+    def cold():
+        module_s3._clients.clear()
+        return module_s3.get_client()
+    benchmark.pedantic(cold, rounds=5, iterations=1)
+    module_s3._clients.clear()
+    check_ceiling(benchmark, "get_client_cold")
+
+
+def test_get_client_warm(benchmark, s3):
+    module_s3.get_client()
+    benchmark(module_s3.get_client)
+    module_s3._clients.clear()
+    check_ceiling(benchmark, "get_client_warm")
+
+
+def test_s3_list(benchmark, s3):
+    # more than two pages of list_objects_v2
+    for i in range(2500):
+        s3.put_object(Bucket=BUCKET, Key=f"list/obj-{i:05d}.parquet", Body=b"x")
+    res = benchmark.pedantic(module_s3.s3_list, args=(f"s3://{BUCKET}/list/",),
+                             kwargs={"client": s3, "retrieve_properties": ["Size"]}, rounds=3, iterations=1)
+    assert len(res) == 2500
+    check_ceiling(benchmark, "s3_list")
+
+
+def test_copy_to_s3(benchmark, s3, files):
+    def upload():
+        for filename in files:
+            module_s3.copy(filename, f"s3://{BUCKET}/copy/{os.path.basename(filename)}", client=s3)
+    benchmark.pedantic(upload, rounds=3, iterations=1)
+    assert len(module_s3.s3_list(f"s3://{BUCKET}/copy/", client=s3)) == len(files)
+    check_ceiling(benchmark, "copy_to_s3")
+
+
+def test_move_s3(benchmark, s3, files):
+    names = [os.path.basename(filename) for filename in files]
+    rounds = iter(range(3))
+
+    def setup():
+        n = next(rounds)
+        for filename, name in zip(files, names):
+            s3.upload_file(filename, BUCKET, f"src{n}/{name}")
+        return (n,), {}
+
+    def move(n):
+        for name in names:
+            module_s3.move(f"s3://{BUCKET}/src{n}/{name}", f"s3://{BUCKET}/dst{n}/{name}", client=s3)
+    benchmark.pedantic(move, setup=setup, rounds=3, iterations=1)
+    assert len(module_s3.s3_list(f"s3://{BUCKET}/dst0/", client=s3)) == len(files)
+    assert not module_s3.s3_list(f"s3://{BUCKET}/src0/", client=s3)
+    check_ceiling(benchmark, "move_s3")
+
+
+def test_md5sum(benchmark, tmp_path):
+    filename = tmp_path / "big.bin"
+    filename.write_bytes(os.urandom(16 * 1024 * 1024))
+    res = benchmark.pedantic(md5sum, args=(str(filename),), rounds=5, iterations=1)
+    assert len(res) == 32
+    check_ceiling(benchmark, "md5sum")
+
+
+def test_tmp_clean(benchmark):
+    def churn():
+        for _ in range(20):
+            with open(module_s3.tmp("x.tif"), "wb") as stream:
+                stream.write(b"x")
+        return module_s3.clean()
+    assert benchmark(churn)
+    check_ceiling(benchmark, "tmp_clean")
+
+
+def test_set_status(benchmark):
+    api = FakeMeteoNetwork().start()
+    try:
+        backend = f"http://127.0.0.1:{api.server.server_port}"
+        benchmark(set_status, backend, "bench", 50, "running")
+        assert api.statuses["bench"] == {"status": "running", "progress": 50}
+    finally:
+        api.stop()
+    check_ceiling(benchmark, "set_status")
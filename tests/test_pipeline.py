@@ -0,0 +1,99 @@
+import os
+import time
+import tempfile
+import unittest
+import threading
+from unittest import mock
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from process_meteonetwork_retriever.utils import module_s3
+from process_meteonetwork_retriever.utils.module_pipeline import (
+    MemoryBudget, SpillQueue, PipelineStats, Stage, pipeline, upload_stage)
+
+
+def batches(n=6, rows=1000):
+    for i in range(n):
+        yield pd.DataFrame({"station_id": [f"s{i}"] * rows, "value": np.arange(rows, dtype="float64") + i})
+
+
+class TestPipeline(unittest.TestCase):
+    """
+    TestPipeline - batches flow through the stages under a memory budget
+    """
+
+    def test_spill_queue(self):
+        q = SpillQueue(maxsize=4, budget=MemoryBudget(limit=1))
+        df = next(batches())
+        for batch in (df, np.arange(10), pa.Table.from_pandas(df, preserve_index=False)):
+            q.put(batch)
+        self.assertEqual(q.spilled, 3)
+        pd.testing.assert_frame_equal(q.get(), df)
+        np.testing.assert_array_equal(q.get(), np.arange(10))
+        self.assertEqual(q.get().num_rows, len(df))
+        self.assertEqual(q.budget.used, 0)
+
+    def test_pipeline(self):
+        stats = PipelineStats()
+        res = list(pipeline(batches(), lambda df: df.assign(value=df["value"] * 2), budget=1, stats=stats))
+        self.assertEqual([df["station_id"][0] for df in res], [f"s{i}" for i in range(6)])
+        self.assertEqual(res[3]["value"].iloc[0], 6.0)
+        self.assertGreater(stats.spilled, 0)
+
+    def test_drop_and_error(self):
+        res = list(pipeline(batches(), lambda df: None if df["station_id"][0] == "s1" else df))
+        self.assertEqual(len(res), 5)
+
+        def fail(df):
+            raise ValueError("bad batch")
+
+        with self.assertRaises(ValueError):
+            list(pipeline(batches(), fail))
+
+    def test_consumer_stops_early(self):
+        before = threading.active_count()
+        budget = MemoryBudget(limit=10**6)
+        g = pipeline(batches(20), Stage(lambda df: df, workers=2), budget=budget, maxsize=1)
+        next(g)
+        g.close()
+        self.assertEqual(threading.active_count(), before)
+        self.assertEqual(budget.used, 0)
+
+        with self.assertRaises(KeyError):
+            for df in pipeline(batches(20), lambda df: df, maxsize=1):
+                raise KeyError("consumer failed")
+        self.assertEqual(threading.active_count(), before)
+
+    def test_workers(self):
+        threads, lock = set(), threading.Lock()
+
+        def slow(df):
+            with lock:
+                threads.add(threading.get_ident())
+            time.sleep(0.05)
+            return df
+
+        stats = PipelineStats()
+        t = time.perf_counter()
+        res = list(pipeline(batches(8), Stage(slow, name="slow", workers=4), stats=stats))
+        self.assertEqual(sorted(df["station_id"][0] for df in res), sorted(f"s{i}" for i in range(8)))
+        self.assertGreater(len(threads), 1)
+        self.assertLess(time.perf_counter() - t, 8 * 0.05)
+        stage = stats.to_dict()["stages"][1]
+        self.assertEqual((stage["name"], stage["workers"], stage["items"]), ("slow", 4, 8))
+        self.assertGreater(stage["utilisation"], 0)
+
+    def test_upload_stage(self):
+        root = tempfile.mkdtemp()
+        uris = list(pipeline(batches(3), upload_stage(lambda df: f"{root}/{df['station_id'][0]}.parquet")))
+        self.assertEqual(sorted(os.listdir(root)), ["s0.parquet", "s1.parquet", "s2.parquet"])
+        self.assertEqual(len(pd.read_parquet(uris[0])), 1000)
+
+    def test_upload_failed(self):
+        stage = upload_stage(lambda df: f"s3://bkt/{df['station_id'][0]}.parquet")
+        with mock.patch.object(module_s3, "s3_upload", return_value=False):
+            self.assertRaisesRegex(RuntimeError, "Could not upload", list, pipeline(batches(3), stage))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from process_meteonetwork_retriever.utils.module_manifest import file_stats, update_manifest
+from process_meteonetwork_retriever.utils.module_query import find_gaps, query
+
+
+def observations(station, start, end, freq="1h"):
+    timestamps = pd.date_range(start, end, freq=freq, inclusive="left", tz="UTC")
+    return pd.DataFrame({"station_id": station, "variable": "temperature",
+                         "timestamp": timestamps, "value": 1.0})
+
+
+class TestQuery(unittest.TestCase):
+    """
+    TestQuery - stored observations are served without calling the API
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.stored = observations("a", "2024-01-01", "2024-01-11")
+        uri = f"{self.root}/station_id==a/part-0.parquet"
+        os.makedirs(os.path.dirname(uri))
+        self.stored.to_parquet(uri, index=False)
+        update_manifest(self.root, add={uri: file_stats(self.stored, os.path.getsize(uri))})
+
+    def test_find_gaps_mid_window_end(self):
+        start, end = pd.Timestamp("2024-01-02", tz="UTC"), pd.Timestamp("2024-01-05T12:00", tz="UTC")
+        stored = self.stored[(self.stored["timestamp"] >= start) & (self.stored["timestamp"] < end)]
+        self.assertEqual(len(find_gaps(stored, ["a"], start, end)), 0)
+
+    def test_find_gaps_live_window(self):
+        start, end = pd.Timestamp("2024-01-02", tz="UTC"), pd.Timestamp("2024-01-06", tz="UTC")
+        stored = self.stored[(self.stored["timestamp"] >= start) & (self.stored["timestamp"] < "2024-01-05T06:00")]
+        gaps = find_gaps(stored, ["a"], start, end, now="2024-01-05T12:00")
+        self.assertEqual([(u.station, u.start.day) for u in gaps], [("a", 5)])
+
+    def test_find_gaps_partial_past_window(self):
+        start, end = pd.Timestamp("2024-01-02", tz="UTC"), pd.Timestamp("2024-01-05", tz="UTC")
+        stored = self.stored[(self.stored["timestamp"] >= start) & (self.stored["timestamp"] < end)]
+        # the run ingesting the 3rd crashed at noon, the one of the 4th started late
+        partial = stored[~stored["timestamp"].between("2024-01-03T12:00", "2024-01-04T06:00", inclusive="left")]
+        gaps = find_gaps(partial, ["a"], start, end, now="2024-02-01")
+        self.assertEqual([u.start.day for u in gaps], [3, 4])
+        self.assertEqual(len(find_gaps(stored, ["a", "b"], start, end, now="2024-02-01")), 3)
+        self.assertEqual(len(find_gaps(stored.assign(station_id="b"), ["a"], start, end)), 3)
+
+    def test_query_from_storage(self):
+        calls = []
+
+        def fetch(station, w0, w1):
+            calls.append((station, w0, w1))
+            return observations(station, w0, w1)
+
+        for _ in range(2):
+            res = query(self.root, "2024-01-02", "2024-01-05T12:00", stations=["a"], fetch=fetch)
+            self.assertEqual(len(res), 3 * 24 + 12)
+        self.assertEqual(calls, [])
+
+    def test_query_fills_gaps(self):
+        calls = []
+
+        def fetch(station, w0, w1):
+            calls.append((station, w0.day))
+            return observations(station, w0, w1)
+
+        res = query(self.root, "2024-01-10", "2024-01-12T12:00", stations=["a"], fetch=fetch)
+        self.assertEqual(calls, [("a", 11), ("a", 12)])
+        self.assertEqual(len(res), 2 * 24 + 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
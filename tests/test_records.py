@@ -0,0 +1,63 @@
+import os
+import time
+import datetime
+import unittest
+from unittest import mock
+import numpy as np
+from process_meteonetwork_retriever.utils.module_records import (
+    StationTable, WorkUnit, WorkUnitTable, variables_mask)
+
+STATIONS = [
+    {"station_code": "a", "lon": 9.1, "lat": 45.4, "elevation": 120, "variables": ["temperature", "rh"]},
+    {"station_code": "b", "lon": 12.3, "lat": 41.9, "variables": ["rain_rate"]},
+    {"station_id": "c", "lon": 9.5, "lat": 45.1, "elevation": None},
+]
+
+
+class TestRecords(unittest.TestCase):
+    """
+    TestRecords - structured arrays behave like the lists of objects they replace
+    """
+
+    def test_stations(self):
+        table = StationTable.from_dicts(STATIONS)
+        self.assertEqual(table.records.itemsize, 88)
+        self.assertEqual(list(table.ids), ["a", "b", "c"])
+        self.assertEqual(table[0].variables, ("temperature", "rh"))
+        self.assertTrue(np.isnan(table[2].elevation))
+        self.assertEqual(list(table.in_bbox((9.0, 45.0, 10.0, 46.0))), [True, False, True])
+        self.assertEqual([s.station_id for s in table[table.has_variable("rain_rate")]], ["b"])
+        self.assertEqual(variables_mask(["unknown"]), 0)
+        self.assertEqual(len(table.to_frame()), 3)
+
+    def test_work_units(self):
+        start = datetime.datetime(2024, 1, 1, 6, tzinfo=datetime.timezone.utc)
+        end = datetime.datetime(2024, 1, 3, tzinfo=datetime.timezone.utc)
+        units = WorkUnitTable.build(["a", "b"], start, end, 86400)
+        self.assertEqual(units.records.itemsize, 20)
+        self.assertEqual(len(units), 4)
+        station, w0, w1 = units[1]
+        self.assertEqual((station, w0.day, w1.day, w0.tzinfo), ("a", 2, 3, datetime.timezone.utc))
+        self.assertEqual(units[0], WorkUnit("a", start.replace(hour=0), start.replace(day=2, hour=0)))
+        self.assertEqual(list(units.station_ids), ["a", "a", "b", "b"])
+        later = units[units.records["start"] >= int(units[1].start.timestamp())]
+        self.assertEqual([(u.station, u.start.day) for u in later], [("a", 2), ("b", 2)])
+
+    @unittest.skipUnless(hasattr(time, "tzset"), "posix only")
+    def test_naive_is_utc(self):
+        try:
+            with mock.patch.dict(os.environ, {"TZ": "America/New_York"}):
+                time.tzset()
+                units = WorkUnitTable.build(["a"], datetime.datetime(2024, 1, 1, 6), datetime.datetime(2024, 1, 2), 86400)
+        finally:
+            time.tzset()
+        self.assertEqual([(u.start.day, u.start.hour, u.start.tzinfo) for u in units],
+                         [(1, 0, datetime.timezone.utc)])
+
+    def test_empty_window(self):
+        start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        self.assertEqual(len(WorkUnitTable.build(["a"], start, start, 3600)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import tempfile
+import unittest
+from process_meteonetwork_retriever.utils.module_result_cache import cache_key, cached_execute, ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+    """
+    TestResultCache - equivalent requests share a key, different ones do not
+    """
+
+    def test_equivalent(self):
+        a = {"time_start": "2024-01-01T09:50:00", "time_end": "2024-01-01T12:10:00",
+             "bbox": [9.123451, 45.0, 9.5, 45.5], "variables": "rh,temperature", "debug": True}
+        b = {"time_start": "2024-01-01T10:00:00Z", "time_end": "2024-01-01T12:00:00+00:00",
+             "bbox": [9.12345, 45.0, 9.5, 45.5], "variables": ["Temperature", "rh"]}
+        self.assertEqual(cache_key(a), cache_key(b))
+
+    def test_different_extent(self):
+        base = {"time_start": "2024-01-01T09:50:00", "time_end": "2024-01-01T12:00:00"}
+        self.assertNotEqual(cache_key(base), cache_key(base | {"time_start": "2024-01-01T09:45:00"}))
+        self.assertNotEqual(cache_key(base), cache_key(base | {"time_end": "2024-01-01T12:15:00"}))
+
+    def test_cached_execute(self):
+        cache = ResultCache(tempfile.mkdtemp())
+        calls = []
+
+        def func(**kwargs):
+            calls.append(kwargs)
+            return {"rows": len(calls)}
+
+        inputs = {"time_start": "2024-01-01T09:50:00", "time_end": "2024-01-01T12:00:00"}
+        self.assertEqual(cached_execute(func, inputs, cache), ({"rows": 1}, False))
+        self.assertEqual(cached_execute(func, inputs | {"jid": "x"}, cache), ({"rows": 1}, True))
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
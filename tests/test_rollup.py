@@ -0,0 +1,81 @@
+import os
+import time
+import tempfile
+import unittest
+import threading
+from unittest import mock
+import pandas as pd
+from process_meteonetwork_retriever.utils import module_rollup
+from process_meteonetwork_retriever.utils.module_lease import Lease, get_backend
+from process_meteonetwork_retriever.utils.module_rollup import (
+    rollup, merge_rollup, update_rollups, partition_lock, rollup_root)
+
+
+def rain(start, periods, value=1.0):
+    return pd.DataFrame({"station_id": "a", "variable": "precipitation",
+                         "timestamp": pd.date_range(start, periods=periods, freq="15min", tz="UTC"),
+                         "value": value})
+
+
+class TestRollup(unittest.TestCase):
+    """
+    TestRollup - incremental rollups equal the rollup of all the rows
+    """
+
+    def setUp(self):
+        self.raw_uri = f"{tempfile.mkdtemp()}/raw.parquet"
+
+    def read(self, freq):
+        return pd.read_parquet(f"{self.raw_uri.rsplit('/', 1)[0]}/rollup/freq=={freq}/year==2024/month==1/rollup.parquet")
+
+    def test_merge(self):
+        df = rain("2024-01-01", 8)
+        merged = merge_rollup(rollup(df[:3]), rollup(df[3:]))
+        pd.testing.assert_frame_equal(merged, rollup(df))
+
+    def test_replay(self):
+        df = rain("2024-01-01", 3)
+        for _ in range(3):
+            update_rollups(df, self.raw_uri)
+        self.assertEqual(self.read("1h")["value"].tolist(), [3.0])
+        # overlapping windows: only the new rows are added
+        update_rollups(rain("2024-01-01T00:30", 4), self.raw_uri)
+        self.assertEqual(self.read("1h")["value"].tolist(), [4.0, 2.0])
+        self.assertEqual(self.read("1D")["value"].tolist(), [6.0])
+
+    def test_concurrent_writers(self):
+        batches = [rain(f"2024-01-01T{h:02d}:00", 4) for h in range(8)]
+        threads = [threading.Thread(target=update_rollups, args=(df, self.raw_uri)) for df in batches]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.read("1D")["value"].tolist(), [32.0])
+
+    def test_lock_renewed(self):
+        root = rollup_root(self.raw_uri)
+        with mock.patch.object(module_rollup, "LOCK_TTL", 0.3):
+            with partition_lock(root, {"year": 2024, "month": 1}):
+                time.sleep(1.0)
+                self.assertFalse(Lease(get_backend(f"{root}/_locks"), "year==2024/month==1").acquire())
+
+    def test_failed_upload(self):
+        real_upload = module_rollup.upload
+
+        def upload(filename, uri, client=None):
+            if "freq==1D" in uri:
+                os.unlink(filename)
+                raise RuntimeError(f"Could not upload {uri}")
+            return real_upload(filename, uri, client)
+
+        df = rain("2024-01-01", 3)
+        with mock.patch.object(module_rollup, "upload", upload):
+            self.assertRaises(RuntimeError, update_rollups, df, self.raw_uri)
+        # the rows are not marked as merged: the replay merges them
+        self.assertFalse(os.path.exists(f"{rollup_root(self.raw_uri)}/_keys/year==2024/month==1/keys.parquet"))
+        update_rollups(df, self.raw_uri)
+        self.assertEqual(self.read("1D")["value"].tolist(), [3.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+from unittest import mock
+import numpy as np
+from process_meteonetwork_retriever.utils import module_shm
+
+
+def cumulate(rain):
+    return np.cumsum(rain, axis=1)
+
+
+class TestShm(unittest.TestCase):
+    """
+    TestShm - blocks processed in a pool equal the in-process result
+    """
+
+    def setUp(self):
+        self.rain = np.random.default_rng(0).random((64, 24))
+
+    def test_parallel_blocks(self):
+        with mock.patch.object(module_shm, "MIN_PARALLEL_BYTES", 0):
+            res = module_shm.parallel_blocks(cumulate, {"rain": self.rain}, self.rain.shape, max_workers=2)
+        np.testing.assert_allclose(res, cumulate(self.rain))
+
+    def test_no_shared_memory(self):
+        with mock.patch.object(module_shm, "MIN_PARALLEL_BYTES", 0), \
+                mock.patch.object(module_shm.shared_memory, "SharedMemory", side_effect=OSError(38, "no /dev/shm")):
+            res = module_shm.parallel_blocks(cumulate, {"rain": self.rain}, self.rain.shape, max_workers=2)
+        np.testing.assert_allclose(res, cumulate(self.rain))
+
+
+if __name__ == '__main__':
+    unittest.main()
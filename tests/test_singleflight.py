@@ -0,0 +1,88 @@
+import os
+import time
+import tempfile
+import unittest
+import datetime
+import threading
+from process_meteonetwork_retriever.utils.module_singleflight import SingleFlight, fetch_units, private_dir
+
+START = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+END = datetime.datetime(2024, 1, 3, tzinfo=datetime.timezone.utc)
+
+
+def temperature(station, w0, w1):
+    return ("temperature", station, w0.day)
+
+
+def rain(station, w0, w1):
+    return ("rain", station, w0.day)
+
+
+class TestSingleFlight(unittest.TestCase):
+    """
+    TestSingleFlight - one call per key, results kept in a private folder
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def test_coalesce(self):
+        flight, calls = SingleFlight(), []
+
+        def func(x):
+            calls.append(x)
+            time.sleep(0.1)
+            return x * 2
+
+        threads = [threading.Thread(target=flight.do, args=("k", func, 21)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(calls, [21])
+
+    def test_shared_and_purged(self):
+        lockdir = f"{self.root}/flight"
+        flight = SingleFlight(lockdir=lockdir, ttl=0.2)
+        self.assertEqual(os.stat(lockdir).st_mode & 0o777, 0o700)
+        self.assertEqual(flight.do("k", lambda: 1), 1)
+        self.assertEqual(SingleFlight(lockdir=lockdir, ttl=0.2).do("k", lambda: 2), 1)
+        time.sleep(0.3)
+        flight.do("other", lambda: 3)
+        self.assertEqual(len([f for f in os.listdir(lockdir) if f.endswith(".pkl")]), 1)
+        self.assertEqual(len([f for f in os.listdir(lockdir) if f.endswith(".lock")]), 1)
+
+    def test_namespace(self):
+        flight = SingleFlight(lockdir=f"{self.root}/flight")
+        res = fetch_units(["a"], START, END, temperature, flight=flight, namespace="data-realtime")
+        self.assertEqual(sorted(res.values()), [("temperature", "a", 1), ("temperature", "a", 2)])
+        # another fetch, or the same one for another namespace, is not served the results
+        res = fetch_units(["a"], START, END, rain, flight=flight, namespace="data-realtime")
+        self.assertEqual(sorted(res.values()), [("rain", "a", 1), ("rain", "a", 2)])
+        calls = []
+        res = fetch_units(["a"], START, END, lambda *unit: calls.append(unit), flight=flight, namespace="rh")
+        self.assertEqual(len(calls), 2)
+
+    def test_not_shared_without_namespace(self):
+        calls = []
+
+        def fetch(station, w0, w1):
+            calls.append(station)
+            return station
+
+        for _ in range(2):
+            self.assertEqual(list(fetch_units(["a", "b"], START, END, fetch).values()), ["a", "a", "b", "b"])
+        self.assertEqual(len(calls), 8)
+
+    @unittest.skipUnless(hasattr(os, "getuid"), "posix only")
+    def test_private_dir(self):
+        shared = f"{self.root}/shared"
+        os.makedirs(shared)
+        os.chmod(shared, 0o777)
+        self.assertRaises(PermissionError, private_dir, shared)
+        os.symlink(self.root, f"{self.root}/link")
+        self.assertRaises(PermissionError, private_dir, f"{self.root}/link")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import io
+import json
+import unittest
+import pandas as pd
+import pyarrow as pa
+from process_meteonetwork_retriever.utils.module_stream import stream
+
+
+class TestStream(unittest.TestCase):
+    """
+    TestStream - streamed outputs are complete whatever the batches
+    """
+
+    def batches(self):
+        yield pd.DataFrame({"station_id": ["a", "b"], "value": [1, 2], "note": [None, None]})
+        yield pd.DataFrame({"station_id": ["c"], "value": [2.5], "note": ["x"]})
+        yield pd.DataFrame({"value": [None], "station_id": ["d"], "note": [None]})
+
+    def test_arrow_types_change(self):
+        mime, chunks = stream(self.batches(), "arrow")
+        table = pa.ipc.open_stream(io.BytesIO(b"".join(chunks))).read_all()
+        self.assertEqual(mime, "application/vnd.apache.arrow.stream")
+        self.assertEqual(table.column("station_id").to_pylist(), ["a", "b", "c", "d"])
+        self.assertEqual(table.column("value").to_pylist(), [1.0, 2.0, 2.5, None])
+        self.assertEqual(table.column("note").to_pylist(), [None, None, "x", None])
+
+    def test_ndjson(self):
+        _, chunks = stream(self.batches(), "ndjson")
+        rows = [json.loads(line) for line in b"".join(chunks).decode("utf-8").splitlines()]
+        self.assertEqual([row["station_id"] for row in rows], ["a", "b", "c", "d"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from typing import Optional
+from process_meteonetwork_retriever.utils.strings import (
+    parse_event, parse_events, validate_event, get_default_values)
+
+
+def retriever(bbox: str = None, time_start: str = None, limit: int = 10, scale: float = 1.0,
+              variables: list = None, station: Optional[int] = None, debug: bool = False,
+              verbose=False, label="x", step="15"):
+    return locals()
+
+
+class TestStrings(unittest.TestCase):
+    """
+    TestStrings - event coercion of parse_event and its validation errors
+    """
+
+    def test_defaults(self):
+        defaults = get_default_values(retriever)
+        self.assertEqual(defaults["limit"], 10)
+        self.assertEqual(defaults["step"], 15)  # numeric string defaults, as before
+        self.assertIsNone(defaults["bbox"])
+
+    def test_legacy_coercion(self):
+        # the coercion parse_event always did on the Lambda events
+        kwargs = parse_event({"bbox": "1,2,3,4", "time_start": "2024", "limit": "5", "scale": "2",
+                              "debug": "true", "verbose": "False", "label": "1.5"}, retriever)
+        self.assertEqual(kwargs["bbox"], "1,2,3,4")
+        self.assertEqual(kwargs["time_start"], 2024)
+        self.assertEqual((kwargs["limit"], kwargs["scale"]), (5, 2.0))
+        self.assertIs(kwargs["debug"], True)
+        self.assertIs(kwargs["verbose"], False)
+        self.assertEqual(kwargs["label"], 1.5)
+
+    def test_typed(self):
+        kwargs, errors = validate_event({"variables": "rh, temperature", "station": "7", "debug": "yes",
+                                         "verbose": "off"}, retriever)
+        self.assertEqual(errors, [])
+        self.assertEqual(kwargs["variables"], ["rh", "temperature"])
+        self.assertEqual(kwargs["station"], 7)
+        self.assertIs(kwargs["debug"], True)
+        self.assertIs(kwargs["verbose"], False)
+
+    def test_errors(self):
+        kwargs, errors = validate_event({"limit": "3.5", "debug": "maybe", "colour": "red"}, retriever)
+        self.assertEqual([e["key"] for e in errors], ["limit", "debug", "colour"])
+        self.assertEqual(errors[2]["error"], "Option <colour> is not available")
+        # the values are still passed through coerce_auto
+        self.assertEqual((kwargs["limit"], kwargs["debug"]), (3.5, "maybe"))
+        self.assertNotIn("colour", kwargs)
+
+    def test_unknown_key_logged(self):
+        with self.assertLogs("process_meteonetwork_retriever.cli.module_log", "WARNING") as logs:
+            parse_event({"colour": "red"}, retriever)
+        self.assertIn("Option <colour> is not available", logs.output[0])
+
+    def test_parse_events(self):
+        res = parse_events([{"limit": "1"}, {"limit": "x"}], retriever)
+        self.assertEqual([kwargs["limit"] for kwargs, _ in res], [1, "x"])
+        self.assertEqual([len(errors) for _, errors in res], [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
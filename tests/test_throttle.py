@@ -0,0 +1,63 @@
+import time
+import unittest
+from unittest import mock
+from requests.exceptions import ChunkedEncodingError
+from process_meteonetwork_retriever.utils import module_http
+from process_meteonetwork_retriever.utils.module_throttle import (
+    AdaptiveLimiter, CircuitBreaker, CircuitOpen, parse_retry_after)
+
+
+class TestThrottle(unittest.TestCase):
+    """
+    TestThrottle - adaptive limit and circuit breaker of the API client
+    """
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertEqual(parse_retry_after(None, 1.5), 1.5)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+    def test_limit_per_endpoint(self):
+        limiter = AdaptiveLimiter(initial=4)
+        limiter.on_success(0.01, "stations")
+        for _ in range(10):
+            limiter.on_success(1.0, "data-realtime")
+        self.assertGreater(limiter.limit, 5)
+        limiter.on_overload()
+        self.assertLess(limiter.limit, 4)
+
+    def test_breaker(self):
+        breaker = CircuitBreaker("x", threshold=2, reset_timeout=0.05)
+        breaker.on_failure()
+        breaker.allow()
+        breaker.on_failure()
+        self.assertRaises(CircuitOpen, breaker.allow)
+        time.sleep(0.06)
+        breaker.allow()  # the probe
+        self.assertRaises(CircuitOpen, breaker.allow)
+        breaker.on_success()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_probe_other_exception(self):
+        name = module_http.endpoint(f"{module_http.API_URL}/probe-test")
+        breaker = module_http.get_breaker(name)
+        breaker.threshold, breaker.reset_timeout = 1, 0.05
+        with mock.patch("requests.request", side_effect=ChunkedEncodingError("broken")):
+            self.assertRaises(ChunkedEncodingError, module_http.api_request, "GET",
+                              f"{module_http.API_URL}/probe-test", retries=0)
+            self.assertEqual(breaker.state, "open")
+            time.sleep(0.06)
+            # the failed probe opens the circuit again instead of leaving it stuck
+            self.assertRaises(ChunkedEncodingError, module_http.api_request, "GET",
+                              f"{module_http.API_URL}/probe-test", retries=0)
+            self.assertFalse(breaker.probing)
+        time.sleep(0.06)
+        with mock.patch("requests.request") as request:
+            request.return_value.status_code = 200
+            request.return_value.content = b"{}"
+            module_http.api_request("GET", f"{module_http.API_URL}/probe-test", retries=0)
+        self.assertEqual(breaker.state, "closed")
+
+
+if __name__ == '__main__':
+    unittest.main()
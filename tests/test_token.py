@@ -0,0 +1,82 @@
+import os
+import time
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from process_meteonetwork_retriever.utils.module_token import TokenManager, login
+
+
+class TestToken(unittest.TestCase):
+    """
+    TestToken - a single refresh of the token shared by threads and processes
+    """
+
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for name in ("METEONETWORK_TOKEN", "METEONETWORK_EMAIL", "METEONETWORK_PASSWORD"):
+            os.environ.pop(name, None)
+        self.path = os.path.join(tempfile.mkdtemp(), "token.json")
+        self.calls = []
+
+    def fetch(self):
+        time.sleep(0.05)
+        self.calls.append(1)
+        return f"token-{len(self.calls)}", 3600
+
+    def test_env_token(self):
+        os.environ["METEONETWORK_TOKEN"] = "static"
+        manager = TokenManager(self.fetch, self.path)
+        self.assertEqual(manager.headers(), {"Authorization": "Bearer static"})
+        self.assertEqual(self.calls, [])
+
+    def test_single_refresh(self):
+        manager = TokenManager(self.fetch, self.path)
+        res = []
+        threads = [threading.Thread(target=lambda: res.append(manager.get())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(res, ["token-1"] * 8)
+        # another process of the host reads the shared file
+        self.assertEqual(TokenManager(self.fetch, self.path).get(), "token-1")
+        self.assertEqual(len(self.calls), 1)
+
+    def test_invalidate(self):
+        manager = TokenManager(self.fetch, self.path)
+        other = TokenManager(self.fetch, self.path)
+        self.assertEqual(manager.get(), "token-1")
+        manager.invalidate("token-1")
+        self.assertEqual(manager.get(), "token-2")
+        # a stale invalidate does not drop the refreshed token
+        other.invalidate("token-1")
+        self.assertEqual(TokenManager(self.fetch, self.path).get(), "token-2")
+
+    def test_expiring(self):
+        manager = TokenManager(lambda: ("short", 60), self.path)
+        manager.get()
+        manager.fetch = self.fetch
+        self.assertEqual(manager.get(), "token-1")
+
+    @unittest.skipUnless(hasattr(os, "getuid"), "posix only")
+    def test_private_dir(self):
+        shared = os.path.join(tempfile.mkdtemp(), "shared")
+        os.makedirs(shared)
+        os.chmod(shared, 0o777)
+        self.assertRaises(PermissionError, TokenManager, self.fetch, f"{shared}/token.json")
+        # a planted symlink is not followed
+        target = os.path.join(tempfile.mkdtemp(), "target")
+        os.symlink(target, f"{self.path}.tmp")
+        self.assertRaises(OSError, TokenManager(self.fetch, self.path).get)
+        self.assertFalse(os.path.exists(target))
+
+    def test_no_credentials(self):
+        self.assertEqual(login(), (None, 0))
+        self.assertEqual(TokenManager(login, self.path).headers(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,19 +1,30 @@
 import unittest
-from process_meteonetwork_retriever import main_python
+import process_meteonetwork_retriever
+from process_meteonetwork_retriever import run_meteonetwork_retriever, parse_event
 
 
 class Test(unittest.TestCase):
     """
-    Test class for the greenamptr module.
+    Test class for the process_meteonetwork_retriever package.
     """
 
+    def test_import(self):
+        """
+        test_import - the package and its utils import without the retriever
+        """
+        from process_meteonetwork_retriever.utils import module_s3
+        self.assertTrue(callable(parse_event))
+        self.assertTrue(callable(module_s3.get_client))
+
     def test_xyz(self):
         """
         test_xyz is a test method that checks if the main function runs without errors.
         """
-        res = main_python(dem=None, out=None, debug=False, verbose=False)
-        # Check if the result is True)
-        self.assertEqual(res, 0, "The main function should return 0 when executed without errors.")
+        if run_meteonetwork_retriever is None:
+            self.skipTest("run_meteonetwork_retriever is not available")
+        kwargs = parse_event({"debug": False, "verbose": False}, run_meteonetwork_retriever)
+        res = run_meteonetwork_retriever(**kwargs)
+        self.assertIsNotNone(res, f"{process_meteonetwork_retriever.__name__} should return a result.")
 
 
 if __name__ == '__main__':